@@ -22,9 +22,9 @@ class PyOS:
         self.running = True
         
         # Initialize core systems
-        self.filesystem = FileSystem()
+        self.filesystem = FileSystem(write_back=True)  # App saves are flushed in the background
         self.window_manager = WindowManager(self.screen, filesystem=self.filesystem)
-        self.app_manager = AppManager(self.filesystem)
+        self.app_manager = AppManager(self.filesystem, window_manager=self.window_manager)
         
         # Create sample files first
         self.app_manager.create_sample_files()
@@ -33,28 +33,51 @@ class PyOS:
         self.desktop = Desktop(self.window_manager, self.app_manager)
         
     def run(self):
-        while self.running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_F5:
-                        # Refresh desktop icons when F5 is pressed
-                        self.desktop.refresh_icons()
+        try:
+            while self.running:
+                # Callbacks of app file I/O that finished during the last frame
+                self.filesystem.dispatch_completions()
+
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.running = False
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_F5:
+                            # Refresh desktop icons when F5 is pressed
+                            self.desktop.refresh_icons()
+                        elif event.key == pygame.K_F8:
+                            # Bring back the last file moved to the trash
+                            self.desktop.restore_last_deleted()
+                        elif event.key == pygame.K_F9:
+                            # Flash damaged regions for debugging the compositor
+                            self.window_manager.compositor.toggle_debug()
                     
-                self.desktop.handle_event(event)
-                self.window_manager.handle_event(event)  # Let window manager handle all keyboard events
+                    if not self.desktop.handle_event(event):  # The taskbar keeps clicks meant for it
+                        self.window_manager.handle_event(event)  # Let window manager handle all keyboard events
             
-            # Update
-            self.window_manager.update()
+                # Update
+                self.desktop.update()
+                self.window_manager.update()
             
-            # Draw
-            self.screen.fill(current_theme.background)  # Use theme background
-            self.desktop.draw()
-            self.window_manager.draw()
-            pygame.display.flip()
+                # Draw only the damaged regions
+                compositor = self.window_manager.compositor
+                damaged = compositor.collect()
+                if damaged:
+                    self.screen.set_clip(compositor.clip_rect)
+                    self.screen.fill(current_theme.background)  # Use theme background
+                    self.desktop.draw()
+                    self.window_manager.draw()
+                    self.desktop.draw_overlay()
+                    self.screen.set_clip(None)
+                    compositor.draw_debug(self.screen)
+                    pygame.display.update(damaged)
             
-            self.clock.tick(60)
+                self.clock.tick(60)
+        finally:
+            # Runs even if the loop crashes, so deferred writes always reach the disk
+            self.app_manager.shutdown()  # Stop any scripts still running
+            self.window_manager.shutdown()  # Stop isolated app processes
+            self.filesystem.close()  # Finish pending saves and persist the manifest
         self.screen.fill((0, 0, 0))  # Clear screen before quitting
         pygame.display.flip()
         pygame.time.delay(700)
@@ -0,0 +1,318 @@
+import os
+import time
+import traceback
+import multiprocessing
+from collections import deque
+from multiprocessing import shared_memory
+from pathlib import Path
+import pygame
+from .file_writer import open_real
+from .async_io import AsyncFileIO
+
+# Each frame buffer is a 32-bit RGBX surface living in shared memory. Apps get two of
+# them (front/back) so the OS never blits a half-drawn frame.
+PIXEL_FORMAT = 'RGBX'
+BYTES_PER_PIXEL = 4
+
+
+def _buffer_surfaces(shm, size):
+    """Wrap both halves of a shared memory block as pygame surfaces (no pixel copies)"""
+    frame_bytes = size[0] * size[1] * BYTES_PER_PIXEL
+    views = [shm.buf[i * frame_bytes:(i + 1) * frame_bytes] for i in range(2)]
+    surfaces = [pygame.image.frombuffer(view, size, PIXEL_FORMAT) for view in views]
+    return views, surfaces
+
+
+class WindowInfo:
+    """Snapshot of a window handed to isolated apps in place of the real object"""
+    def __init__(self, window):
+        self.window_id = id(window)
+        self.title = window.title
+        self.x = window.x
+        self.y = window.y
+        self.width = window.width
+        self.height = window.height
+        self.active = window.active
+
+    def __eq__(self, other):
+        return isinstance(other, WindowInfo) and other.window_id == self.window_id
+
+    def __hash__(self):
+        return self.window_id
+
+
+def dispatch_call(api, target, name, args, kwargs):
+    """Run an API call on behalf of a child process; returns the reply message"""
+    try:
+        if target == 'fs':
+            if name.startswith('_'):
+                raise AttributeError(name)
+            return ('reply', True, getattr(api.filesystem, name)(*args, **kwargs))
+
+        if name == 'windows':
+            return ('reply', True, [WindowInfo(w) for w in api.windows])
+        if name == 'get_performance':
+            return ('reply', True, api.get_performance())
+
+        # Map window snapshots back to the real windows
+        windows = {id(w): w for w in api.windows}
+        real = [windows.get(arg.window_id) if isinstance(arg, WindowInfo) else arg for arg in args]
+        if name == 'terminate_window':
+            if real[0] is None:
+                return ('reply', True, False)
+            return ('reply', True, api.terminate_window(*real))
+        raise AttributeError(name)
+    except Exception as e:
+        return ('reply', False, f"{type(e).__name__}: {e}")
+
+
+class _Channel:
+    """Child side of the pipe: requests to the OS wait for their reply, everything else queues up"""
+    def __init__(self, conn):
+        self.conn = conn
+        self.pending = deque()
+
+    def recv(self):
+        if self.pending:
+            return self.pending.popleft()
+        return self.conn.recv()
+
+    def call(self, target, name, *args, **kwargs):
+        self.conn.send(('call', target, name, args, kwargs))
+        while True:
+            msg = self.conn.recv()
+            if msg[0] == 'reply':
+                ok, value = msg[1], msg[2]
+                if not ok:
+                    raise RuntimeError(value)
+                return value
+            self.pending.append(msg)
+
+
+class _RemoteFileSystem:
+    """Forwards filesystem calls to the OS process"""
+    def __init__(self, channel):
+        self._channel = channel
+        # The channel can only be used from the app's main thread, so async calls go through
+        # it right away; callbacks still wait for the next frame like in-process ones
+        self._io = AsyncFileIO(self, synchronous=True)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._channel.call('fs', name, *args, **kwargs)
+
+    def open_file(self, path, mode='rb'):
+        """Opened right here on the real file, so streamed data doesn't go through the pipe"""
+        return open_real(Path(self._channel.call('fs', 'real_path', path)), mode)
+
+    def read_async(self, path, callback=None):
+        return self._io.read(path, callback)
+
+    def write_async(self, path, content, file_type="txt", callback=None):
+        return self._io.write(path, content, file_type, callback)
+
+    def list_async(self, path="", sort_by="name", reverse=False, offset=0, limit=None, callback=None):
+        return self._io.list(path, sort_by, reverse, offset, limit, callback)
+
+    def create_snapshot_async(self, name=None, callback=None):
+        return self._io.create_snapshot(name, callback)
+
+    def restore_snapshot_async(self, snapshot_id, callback=None):
+        return self._io.restore_snapshot(snapshot_id, callback)
+
+
+class RemoteAppAPI:
+    """Same surface as PyOSAppAPI, backed by calls to the OS process"""
+    def __init__(self, channel, window_info=None):
+        self._channel = channel
+        self._fs = _RemoteFileSystem(channel)
+        self.window = window_info  # The app's own window (scripts have none)
+        self.version = "1.0"
+
+    @property
+    def windows(self):
+        return self._channel.call('api', 'windows')
+
+    def get_performance(self):
+        return self._channel.call('api', 'get_performance')
+
+    def terminate_window(self, window, caller_window=None):
+        return self._channel.call('api', 'terminate_window', window, caller_window)
+
+    @property
+    def filesystem(self):
+        return self._fs
+
+
+def _run_app(conn, app_code, path, title, size, shm_name, window_info):
+    """Entry point of an isolated app process"""
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'  # Leave SIGTERM alone so the OS can stop us
+    pygame.init()
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views, surfaces = _buffer_surfaces(shm, size)
+    rect = pygame.Rect(0, 0, size[0], size[1])
+    channel = _Channel(conn)
+
+    # The app only sees its own content area, so the mouse is reported relative to it
+    mouse_pos = [(0, 0)]
+    pygame.mouse.get_pos = lambda: mouse_pos[0]
+
+    namespace = {
+        'pygame': pygame,
+        'psutil': __import__('psutil'),
+        'random': __import__('random'),
+        'math': __import__('math'),
+        'time': __import__('time'),
+        'sys': __import__('sys'),
+        'io': __import__('io'),
+        'os': os,
+        '__name__': '__main__',
+        '__file__': path,
+        '__builtins__': __builtins__,
+        'running': True,
+        'delta_time': 0.0,
+        'api': RemoteAppAPI(channel, window_info),
+        'is_taskmanager': 'tskmngr.pya' in title.lower()
+    }
+
+    back = 0
+    try:
+        exec(app_code, namespace)
+        if 'main' not in namespace:
+            raise Exception("PyOS App must define a main(screen, recSt) function")
+        if 'init' in namespace:
+            namespace['init'](rect)
+        conn.send(('ready', namespace.get('TARGET_FPS')))
+
+        while True:
+            msg = channel.recv()
+            if msg[0] == 'frame':
+                namespace['api'].filesystem._io.dispatch()
+                namespace['delta_time'] = msg[1]
+                mouse_pos[0] = msg[2]
+                namespace['main'](surfaces[back], rect)
+                conn.send(('frame_done', back))
+                back ^= 1
+            elif msg[0] == 'event':
+                if 'handle_event' in namespace:
+                    if namespace['handle_event'](pygame.event.Event(msg[1], msg[2])) is False:
+                        conn.send(('close',))
+            elif msg[0] == 'close':
+                if 'close' in namespace:
+                    namespace['close']()
+                break
+    except (EOFError, BrokenPipeError):
+        pass  # OS side went away
+    except Exception:
+        try:
+            conn.send(('error', traceback.format_exc()))
+        except (EOFError, BrokenPipeError):
+            pass
+    finally:
+        del surfaces
+        for view in views:
+            view.release()
+        shm.close()
+
+
+class IsolatedAppHost:
+    """Runs a .pya app in its own process, drawing into a shared-memory framebuffer"""
+    def __init__(self, window, app_code, path, size):
+        self.window = window
+        self.size = size
+        frame_bytes = size[0] * size[1] * BYTES_PER_PIXEL
+        self._shm = shared_memory.SharedMemory(create=True, size=frame_bytes * 2)
+        self._views, self._surfaces = _buffer_surfaces(self._shm, size)
+        self.front = 0  # Buffer holding the last finished frame
+        self.frame_pending = False  # Don't queue up frames behind a slow app
+        self.ready = False
+        self.target_fps = None
+        self.error = None
+
+        # Spawn (not fork) so the child gets a clean interpreter without our display
+        ctx = multiprocessing.get_context('spawn')
+        self._conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_run_app,
+            args=(child_conn, app_code, path, window.title, size, self._shm.name, WindowInfo(window)),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    @property
+    def surface(self):
+        return self._surfaces[self.front]
+
+    @property
+    def alive(self):
+        return self.error is None and self.process.is_alive()
+
+    def request_frame(self, delta_time, mouse_pos):
+        if self.frame_pending or not self.ready:
+            return
+        self._send(('frame', delta_time, mouse_pos))
+        self.frame_pending = True
+
+    def send_event(self, event):
+        self._send(('event', event.type, event.dict))
+
+    def _send(self, msg):
+        try:
+            self._conn.send(msg)
+        except (OSError, EOFError):
+            self.error = "App process is gone"
+
+    def poll(self, api):
+        """Handle messages from the app process; returns False if the app asked to close"""
+        keep_open = True
+        try:
+            while self._conn.poll():
+                msg = self._conn.recv()
+                if msg[0] == 'ready':
+                    self.ready = True
+                    self.target_fps = msg[1]
+                elif msg[0] == 'frame_done':
+                    self.front = msg[1]
+                    self.frame_pending = False
+                elif msg[0] == 'call':
+                    self._conn.send(dispatch_call(api, *msg[1:]))
+                elif msg[0] == 'close':
+                    keep_open = False
+                elif msg[0] == 'error':
+                    self.error = msg[1]
+        except (OSError, EOFError):
+            self.error = self.error or "App process is gone"
+        return keep_open
+
+    def close(self, api, timeout=2.0):
+        """Let the app run its close handler, answering its API calls meanwhile (e.g. a save
+        on close), then kill it if it still hasn't exited by the deadline"""
+        if self._shm is None:
+            return  # Already closed
+        self._send(('close',))
+        deadline = time.time() + timeout
+        try:
+            while self.process.is_alive() and time.time() < deadline:
+                if self._conn.poll(0.05):
+                    msg = self._conn.recv()
+                    if msg[0] == 'call':
+                        self._conn.send(dispatch_call(api, *msg[1:]))
+        except (OSError, EOFError):
+            pass  # Pipe closed: the app is on its way out
+        self.process.join(max(0.0, deadline - time.time()))
+        if self.process.is_alive():
+            self.process.kill()  # Misbehaving app, don't wait on it
+            self.process.join()
+        self._conn.close()
+        self._surfaces = []
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
@@ -1,16 +1,17 @@
+import sys
+from .script_runner import ScriptRunner
+
 class AppManager:
-    def __init__(self, filesystem):
+    def __init__(self, filesystem, max_script_workers=None, script_timeout=None, window_manager=None):
         self.filesystem = filesystem
+        # .py scripts run in worker processes so they don't fight the UI for the GIL
+        self.scripts = ScriptRunner(filesystem, max_script_workers, script_timeout, window_manager)
 
-    def list_files(self):
-        """List all files in the root directory"""
+    def list_files(self, sort_by="name", offset=0, limit=None):
+        """List (name, file_type) for files in the root directory, from metadata only"""
         try:
-            contents = self.filesystem.list_directory()
-            files = []
-            for filename in contents["files"]:
-                file = self.filesystem.read_file(filename)
-                files.append((filename, file.file_type))
-            return files
+            entries = self.filesystem.list_files("", sort_by, offset=offset, limit=limit)
+            return [(entry.name, entry.file_type) for entry in entries]
         except FileNotFoundError:
             return []
 
@@ -22,13 +23,21 @@ class AppManager:
         except FileNotFoundError:
             return None
 
-    def execute_file(self, filename):
-        """Execute a file if it's executable"""
+    def execute_file(self, filename, output=None):
+        """Execute a file if it's executable. Apps return their code, .py scripts
+        are queued on the script runner and return a ScriptRun"""
         try:
-            return self.filesystem.execute_file(filename)
+            result = self.filesystem.execute_file(filename)
+            if result and self.filesystem.read_file(filename).file_type == "py":
+                return self.scripts.submit(result, output if output is not None else sys.stdout)
+            return result
         except FileNotFoundError:
             return False
 
+    def shutdown(self):
+        """Stop all running scripts"""
+        self.scripts.shutdown()
+
     def create_sample_files(self):
         """Create some sample files in the filesystem"""
         return # disabled.
@@ -0,0 +1,68 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class AsyncFileIO:
+    """Non-blocking file calls for apps. Work runs on a small pool of I/O threads; callbacks
+    are held back and run on the UI thread by dispatch(), at the start of the next frame."""
+    def __init__(self, filesystem, max_workers=4, synchronous=False):
+        self.filesystem = filesystem
+        self.max_workers = max_workers
+        # Synchronous mode runs each call right away (for callers whose filesystem isn't
+        # thread-safe), but still defers callbacks to dispatch()
+        self.synchronous = synchronous
+        self._pool = None
+        self._completed = deque()  # (callback, future) waiting for dispatch()
+        self._lock = threading.Lock()
+
+    def _submit(self, fn, args, callback):
+        if self.synchronous:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="pyos-io")
+                future = self._pool.submit(fn, *args)
+        if callback is not None:
+            future.add_done_callback(lambda done: self._completed.append((callback, done)))
+        return future
+
+    def read(self, path, callback=None):
+        return self._submit(self.filesystem.read_file, (path,), callback)
+
+    def write(self, path, content, file_type="txt", callback=None):
+        def write():
+            # A callable builds the content on the I/O thread (e.g. a big json.dumps)
+            return self.filesystem.create_file(path, content() if callable(content) else content, file_type)
+        return self._submit(write, (), callback)
+
+    def list(self, path="", sort_by="name", reverse=False, offset=0, limit=None, callback=None):
+        return self._submit(self.filesystem.list_files, (path, sort_by, reverse, offset, limit), callback)
+
+    def create_snapshot(self, name=None, callback=None):
+        return self._submit(self.filesystem.create_snapshot, (name,), callback)
+
+    def restore_snapshot(self, snapshot_id, callback=None):
+        # Listeners hear about the restored paths from dispatch_completions on the UI thread
+        return self._submit(self.filesystem.restore_snapshot, (snapshot_id, False), callback)
+
+    def dispatch(self):
+        """Run the callbacks of finished calls; call once per frame from the UI thread"""
+        for _ in range(len(self._completed)):
+            callback, future = self._completed.popleft()
+            try:
+                callback(future)
+            except Exception as e:
+                print(f"Error in file callback: {e}")
+
+    def shutdown(self):
+        """Wait for calls in flight (so their writes land) and stop the pool"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
@@ -0,0 +1,103 @@
+import pygame
+
+class Compositor:
+    """Tracks damaged screen regions so a frame only redraws and presents what changed"""
+    def __init__(self, screen, max_rects=16):
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.max_rects = max_rects  # Past this many rects just present their union
+        self._damage = [self.screen_rect.copy()]  # First frame draws everything
+        self._quiet_damage = []  # Damage that should not flash in the debug overlay
+        self._window_states = {}  # window -> (rect, active, stack index, title)
+        self.clip_rect = None
+
+        # Debug overlay that flashes damaged rects
+        self.debug = False
+        self.flash_frames = 10
+        self.flash_color = (255, 0, 255)
+        self._flashes = []  # [rect, frames_left]
+
+    def damage(self, rect):
+        """Mark a screen region as needing a redraw"""
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width > 0 and rect.height > 0:
+            self._damage.append(rect)
+
+    def damage_all(self):
+        """Mark the whole screen as needing a redraw"""
+        self._damage.append(self.screen_rect.copy())
+
+    def toggle_debug(self):
+        self.debug = not self.debug
+        if not self.debug:
+            # Erase any flashes still on screen
+            for rect, _ in self._flashes:
+                self._quiet_damage.append(rect)
+            self._flashes.clear()
+
+    def track_windows(self, windows):
+        """Damage windows that moved, changed state or invalidated their content"""
+        states = {}
+        for index, window in enumerate(windows):
+            rect = window.get_rect()
+            state = (rect, window.active, index, window.title)
+            old = self._window_states.get(window)
+            if old is None:
+                self.damage(rect)  # Newly opened
+            elif old != state:
+                self.damage(old[0])  # Moved, raised, (de)activated or retitled
+                self.damage(rect)
+            elif window.dirty or window.animated:
+                self.damage(rect)
+            window.dirty = False
+            states[window] = state
+
+        # Uncover whatever was under closed windows
+        for window, old in self._window_states.items():
+            if window not in states:
+                self.damage(old[0])
+        self._window_states = states
+
+    def collect(self):
+        """Get the merged list of damaged rects for this frame and reset damage"""
+        # Expire debug flashes so the next redraw erases them
+        for flash in self._flashes:
+            flash[1] -= 1
+        for rect, frames_left in self._flashes:
+            if frames_left <= 0:
+                self._quiet_damage.append(rect)
+        self._flashes = [flash for flash in self._flashes if flash[1] > 0]
+
+        loud = self._merge(self._damage)
+        quiet = [pygame.Rect(rect).clip(self.screen_rect) for rect in self._quiet_damage]
+        self._damage = []
+        self._quiet_damage = []
+
+        if self.debug:
+            self._flashes.extend([rect.copy(), self.flash_frames] for rect in loud)
+
+        rects = self._merge(loud + quiet)
+        self.clip_rect = rects[0].unionall(rects[1:]) if rects else None
+        return rects
+
+    def _merge(self, rects):
+        """Merge overlapping rects so no pixel is presented twice"""
+        merged = []
+        for rect in rects:
+            rect = pygame.Rect(rect)
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        if len(merged) > self.max_rects:
+            return [merged[0].unionall(merged[1:])]
+        return merged
+
+    def draw_debug(self, screen):
+        """Outline freshly damaged rects when the debug overlay is on"""
+        if not self.debug:
+            return
+        for rect, frames_left in self._flashes:
+            if frames_left == self.flash_frames:
+                pygame.draw.rect(screen, self.flash_color, rect, 2)
@@ -1,9 +1,12 @@
 import pygame
-import sys
-import io
-from threading import Thread
+import time
+from collections import OrderedDict
 from .window_manager import Window, TerminalWindow, PyAppWindow
 from .theme import current_theme
+from .fonts import font_cache
+from .script_output import ScriptOutput
+from .script_runner import ScriptRun
+from .rope import Rope
 
 class TaskbarButton:
     def __init__(self, x, y, width, height, text, window=None, is_power=False):
@@ -12,19 +15,77 @@ class TaskbarButton:
         self.window = window
         self.is_power = is_power
         self.is_hovered = False
-        self.font = pygame.font.Font(None, 20)
+        self._surface = None
+        self._surface_key = None  # (text, hovered, size, theme revision) it was rendered with
         
     def draw(self, screen):
-        color = current_theme.taskbar_button
-        if self.is_hovered:
-            color = current_theme.taskbar_button_hover
-            
-        pygame.draw.rect(screen, color, self.rect)
+        key = (self.text, self.is_hovered, self.rect.size, current_theme.revision)
+        if key != self._surface_key:
+            # Re-render only when something visible changed
+            color = current_theme.taskbar_button
+            if self.is_hovered:
+                color = current_theme.taskbar_button_hover
+            surface = pygame.Surface(self.rect.size)
+            local = surface.get_rect()
+            surface.fill(color)
+            pygame.draw.rect(surface, current_theme.taskbar_border, local, 1)
+            text_surface = font_cache.render(self.text, current_theme.text, 20)
+            surface.blit(text_surface, text_surface.get_rect(center=local.center))
+            self._surface, self._surface_key = surface, key
+        screen.blit(self._surface, self.rect)
+
+class TaskbarMenu:
+    """Scrollable list of the windows that don't fit on the taskbar, opened above it"""
+    def __init__(self, right, bottom, width=250, row_height=24, max_rows=12):
+        self.right = right
+        self.bottom = bottom
+        self.width = width
+        self.row_height = row_height
+        self.max_rows = max_rows
+        self.windows = []
+        self.scroll_row = 0
+        self.hovered = None  # Index of the row under the mouse
+        self.rect = pygame.Rect(right - width, bottom, width, 0)
+
+    def set_windows(self, windows):
+        self.windows = list(windows)
+        self.scroll_row = min(self.scroll_row, max(0, len(self.windows) - self.max_rows))
+        self.hovered = None
+        height = min(len(self.windows), self.max_rows) * self.row_height
+        self.rect = pygame.Rect(self.right - self.width, self.bottom - height, self.width, height)
+
+    def scroll(self, rows):
+        """Scroll by a number of rows; returns whether the list moved"""
+        row = min(max(0, self.scroll_row + rows), max(0, len(self.windows) - self.max_rows))
+        if row == self.scroll_row:
+            return False
+        self.scroll_row = row
+        return True
+
+    def index_at(self, pos):
+        if not self.rect.collidepoint(pos):
+            return None
+        index = self.scroll_row + (pos[1] - self.rect.top) // self.row_height
+        return index if index < len(self.windows) else None
+
+    def draw(self, screen):
+        pygame.draw.rect(screen, current_theme.taskbar_bg, self.rect)
+        visible = self.windows[self.scroll_row:self.scroll_row + self.max_rows]
+        for row, window in enumerate(visible):
+            row_rect = pygame.Rect(self.rect.x, self.rect.y + row * self.row_height, self.rect.width, self.row_height)
+            if self.scroll_row + row == self.hovered:
+                pygame.draw.rect(screen, current_theme.taskbar_button_hover, row_rect)
+            text = font_cache.render(window.title, current_theme.text, 20)
+            screen.blit(text, text.get_rect(left=row_rect.x + 8, centery=row_rect.centery))
+        if len(self.windows) > self.max_rows:
+            # Scrollbar along the right edge
+            track = self.rect.inflate(0, -4)
+            track.width, track.right = 4, self.rect.right - 3
+            thumb = track.copy()
+            thumb.height = max(10, track.height * self.max_rows // len(self.windows))
+            thumb.top = track.top + (track.height - thumb.height) * self.scroll_row // (len(self.windows) - self.max_rows)
+            pygame.draw.rect(screen, current_theme.accent, thumb)
         pygame.draw.rect(screen, current_theme.taskbar_border, self.rect, 1)
-        
-        text_surface = self.font.render(self.text, True, current_theme.text)
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        screen.blit(text_surface, text_rect)
 
 class Taskbar:
     def __init__(self, screen_width, screen_height):
@@ -32,42 +93,124 @@ class Taskbar:
         self.y = screen_height - self.height
         self.width = screen_width
         self.rect = pygame.Rect(0, self.y, self.width, self.height)
-        self.buttons = []
+        self.button_width = 150
+        self.buttons = []  # One per window, in the order they were opened
+        self._buttons_by_window = {}
+        self.visible_buttons = []  # The buttons that fit on the bar; the rest are in the menu
         
         # Create power button
         power_width = 80
         self.power_button = TaskbarButton(5, self.y + 2, power_width, self.height - 4, "Shutdown...", is_power=True)
-        
-    def update_window_buttons(self, windows):
-        # Clear existing window buttons
-        self.buttons.clear()
-        
-        # Create buttons for each window
-        button_width = 150
+
+        # Opens the menu of windows that don't fit
+        self.overflow_button = TaskbarButton(0, self.y + 2, 60, self.height - 4, "")
+        self.menu = TaskbarMenu(self.width - 5, self.y)
+        self.menu_open = False
+
+    def add_window(self, window):
+        if window in self._buttons_by_window:
+            return
+        button = TaskbarButton(0, self.y + 2, self.button_width, self.height - 4, window.title, window)
+        self.buttons.append(button)
+        self._buttons_by_window[window] = button
+        self._layout()
+
+    def remove_window(self, window):
+        button = self._buttons_by_window.pop(window, None)
+        if button is not None:
+            self.buttons.remove(button)
+            self._layout()
+
+    def sync_titles(self):
+        """Pick up retitled windows; returns the rects that need redrawing"""
+        changed = []
+        for button in self.buttons:
+            if button.text != button.window.title:
+                button.text = button.window.title
+                if button in self.visible_buttons:
+                    changed.append(button.rect)
+                elif self.menu_open:
+                    changed.append(self.menu.rect)
+        return changed
+
+    def _layout(self):
+        # Place as many buttons as fit after the power button; the overflow button takes the last slot
         x = 90  # Increased from 80 to give more space after power button
-        for window in windows:
-            if x + button_width > self.width:
-                break
-            button = TaskbarButton(x, self.y + 2, button_width, self.height - 4, window.title, window)
-            self.buttons.append(button)
-            x += button_width + 5
-            
+        step = self.button_width + 5
+        slots = (self.width - x + 5) // step
+        if len(self.buttons) > slots:
+            slots = max(0, (self.width - x - self.overflow_button.rect.width) // step)
+        self.visible_buttons = self.buttons[:slots]
+        for i, button in enumerate(self.visible_buttons):
+            button.rect.x = x + i * step
+        hidden = self.buttons[slots:]
+        self.overflow_button.text = f"+{len(hidden)}"
+        self.overflow_button.rect.x = x + slots * step
+        self.menu.set_windows(button.window for button in hidden)
+        if not hidden:
+            self.menu_open = False
+
+    @property
+    def has_overflow(self):
+        return len(self.visible_buttons) < len(self.buttons)
+
+    @property
+    def damage_rect(self):
+        """Everything the taskbar draws, including the menu when it's open"""
+        return self.rect.union(self.menu.rect) if self.menu_open else self.rect
+
     def handle_event(self, event, window_manager):
+        compositor = window_manager.compositor
         if event.type == pygame.MOUSEMOTION:
-            # Update hover states
+            # Update hover states, redrawing only buttons whose state flipped
             mouse_pos = event.pos
-            self.power_button.is_hovered = self.power_button.rect.collidepoint(mouse_pos)
-            for button in self.buttons:
-                button.is_hovered = button.rect.collidepoint(mouse_pos)
+            buttons = [self.power_button] + self.visible_buttons
+            if self.has_overflow:
+                buttons.append(self.overflow_button)
+            for button in buttons:
+                hovered = bool(button.rect.collidepoint(mouse_pos))
+                if hovered != button.is_hovered:
+                    button.is_hovered = hovered
+                    compositor.damage(button.rect)
+            if self.menu_open:
+                hovered = self.menu.index_at(mouse_pos)
+                if hovered != self.menu.hovered:
+                    self.menu.hovered = hovered
+                    compositor.damage(self.menu.rect)
+
+        elif event.type == pygame.MOUSEBUTTONDOWN and self.menu_open and self.menu.rect.collidepoint(event.pos):
+            if event.button in (4, 5):  # Mouse wheel scrolls the menu
+                if self.menu.scroll(-1 if event.button == 4 else 1):
+                    compositor.damage(self.menu.rect)
+            elif event.button == 1:
+                index = self.menu.index_at(event.pos)
+                if index is not None:
+                    window_manager.bring_to_front(self.menu.windows[index])
+                    self.menu_open = False
+                    compositor.damage(self.menu.rect)
+            return True
                 
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # Left click only
             mouse_pos = event.pos
+            if self.menu_open:
+                # Clicking anywhere else closes the menu
+                self.menu_open = False
+                compositor.damage(self.menu.rect)
+                if self.overflow_button.rect.collidepoint(mouse_pos):
+                    return True
+
             if self.power_button.rect.collidepoint(mouse_pos):
                 window_manager.quit_requested = True
                 pygame.event.post(pygame.event.Event(pygame.QUIT))  # Force quit event
                 return True
+
+            if self.has_overflow and self.overflow_button.rect.collidepoint(mouse_pos):
+                self.menu_open = True
+                self.menu.hovered = None
+                compositor.damage(self.menu.rect)
+                return True
                 
-            for button in self.buttons:
+            for button in self.visible_buttons:
                 if button.rect.collidepoint(mouse_pos):
                     window_manager.bring_to_front(button.window)
                     return True
@@ -83,8 +226,14 @@ class Taskbar:
         self.power_button.draw(screen)
         
         # Draw window buttons
-        for button in self.buttons:
+        for button in self.visible_buttons:
             button.draw(screen)
+        if self.has_overflow:
+            self.overflow_button.draw(screen)
+
+    def draw_menu(self, screen):
+        if self.menu_open:
+            self.menu.draw(screen)
 
 class FileIcon:
     def __init__(self, name, x, y, file_type):
@@ -95,29 +244,130 @@ class FileIcon:
         self.height = 64
         self.file_type = file_type
         self.rect = pygame.Rect(x, y, self.width, self.height)
+        self._label = None  # (theme revision, rendered name)
 
-    def draw(self, screen):
+    def label(self):
+        """The rendered name, kept on the icon so scrolling doesn't re-render it"""
+        if self._label is None or self._label[0] != current_theme.revision:
+            self._label = (current_theme.revision, font_cache.render(self.name, current_theme.text, 20))
+        return self._label[1]
+
+    def draw(self, screen, offset_y=0):
         # Draw icon with theme colors
-        pygame.draw.rect(screen, current_theme.button_bg, self.rect)
-        pygame.draw.rect(screen, current_theme.accent, self.rect, 2)  # Green outline
+        rect = self.rect.move(0, offset_y)
+        pygame.draw.rect(screen, current_theme.button_bg, rect)
+        pygame.draw.rect(screen, current_theme.accent, rect, 2)  # Green outline
         
         # Draw icon text
-        font = pygame.font.Font(None, 20)
-        text = font.render(self.name, True, current_theme.text)
-        text_rect = text.get_rect(centerx=self.x + self.width//2, top=self.y + self.height + 5)
+        text = self.label()
+        text_rect = text.get_rect(centerx=rect.centerx, top=rect.bottom + 5)
         screen.blit(text, text_rect)
 
+class IconGrid:
+    """Desktop icons laid out on a fixed grid that scrolls by rows.
+    Icons are only built for cells that have been on screen, drawing covers just the visible
+    (and damaged) rows, and a click maps straight to its cell instead of testing every icon."""
+    def __init__(self, width, height, margin=20, cell_size=100, icon_size=64):
+        self.margin = margin
+        self.cell_size = cell_size
+        self.icon_size = icon_size
+        self.rect = pygame.Rect(0, 0, width, height)  # Desktop area above the taskbar
+        self.columns = max(1, (width - margin) // cell_size)
+        self.visible_rows = max(1, (height - margin) // cell_size)
+        self.files = []  # (name, file_type) in display order
+        self.scroll_row = 0
+        self._icons = {}  # Index -> FileIcon, built on first draw
+
+    @property
+    def rows(self):
+        return -(-len(self.files) // self.columns)
+
+    @property
+    def max_scroll(self):
+        return max(0, self.rows - self.visible_rows)
+
+    def set_files(self, files):
+        self.files = list(files)
+        self._icons = {}
+        self.scroll_row = min(self.scroll_row, self.max_scroll)
+
+    def scroll(self, rows):
+        """Scroll by a number of rows; returns whether the view moved"""
+        row = min(max(0, self.scroll_row + rows), self.max_scroll)
+        if row == self.scroll_row:
+            return False
+        self.scroll_row = row
+        return True
+
+    def icon(self, index):
+        icon = self._icons.get(index)
+        if icon is None:
+            name, file_type = self.files[index]
+            x = self.margin + (index % self.columns) * self.cell_size
+            y = self.margin + (index // self.columns) * self.cell_size
+            icon = self._icons[index] = FileIcon(name, x, y, file_type)
+        return icon
+
+    def icon_at(self, pos):
+        """The icon under a screen position, or None"""
+        x, y = pos[0] - self.margin, pos[1] - self.margin
+        if x < 0 or y < 0 or not self.rect.collidepoint(pos):
+            return None
+        column, row = x // self.cell_size, y // self.cell_size + self.scroll_row
+        if column >= self.columns or x % self.cell_size >= self.icon_size or y % self.cell_size >= self.icon_size:
+            return None
+        index = row * self.columns + column
+        return self.icon(index) if index < len(self.files) else None
+
+    def draw(self, screen, clip_rect=None):
+        area = self.rect.clip(clip_rect) if clip_rect is not None else self.rect
+        if not area.width or not area.height:
+            return
+        offset_y = -self.scroll_row * self.cell_size
+        # Rows whose cell overlaps the area; a cell holds the icon and its label
+        first = max(self.scroll_row, (area.top - self.margin - offset_y) // self.cell_size)
+        last = min(self.rows, (area.bottom - self.margin - offset_y) // self.cell_size + 1,
+                   self.scroll_row + self.visible_rows + 1)
+        for index in range(first * self.columns, min(len(self.files), last * self.columns)):
+            self.icon(index).draw(screen, offset_y)
+
+        if self.max_scroll:
+            # Scrollbar along the right edge
+            track = pygame.Rect(self.rect.right - 8, self.rect.top + 4, 4, self.rect.height - 8)
+            thumb = track.copy()
+            thumb.height = max(20, track.height * self.visible_rows // self.rows)
+            thumb.top = track.top + (track.height - thumb.height) * self.scroll_row // self.max_scroll
+            pygame.draw.rect(screen, current_theme.taskbar_border, track)
+            pygame.draw.rect(screen, current_theme.accent, thumb)
+
 class TextEditorWindow(Window):
-    def __init__(self, title, x, y, width, height, content, filesystem=None, filename=None):
+    def __init__(self, title, x, y, width, height, content, filesystem=None, filename=None,
+                 autosave_delay=None):
         super().__init__(title, x, y, width, height)
+        self.base_title = title
         self.content = content
-        self.font = pygame.font.Font(None, 24)
+        self.font = font_cache.get_font(None, 24)
         self.text_color = current_theme.editor_text
         self.line_height = 25
         self.scroll_y = 0
         self.cursor_pos = [0, 0]  # [line, char]
         self.selection_start = None
-        self.lines = content.split('\n')
+        self.buffer = Rope(content)  # Persistent rope: O(log n) edits, free snapshots
+
+        # Saving happens on the filesystem's writer thread; these track where it's at
+        self.saved_buffer = self.buffer  # Last version handed to a save
+        self.save_job = None
+        self._saving_buffer = None
+        self.changed_on_disk = False
+        self.autosave_delay = autosave_delay  # ms of quiet after an edit before autosaving; None disables
+        self._seen_buffer = self.buffer
+        self._last_edit_time = 0
+        
+        # Rendered lines keyed by their text, so only edited lines get re-rendered
+        self.visible_lines = (height - self.title_bar_height) // self.line_height + 2
+        self._line_cache = OrderedDict()
+        self._width_cache = OrderedDict()  # Line text -> cumulative glyph advances
+        self.max_cached_lines = max(64, self.visible_lines * 4)
         self.filesystem = filesystem
         self.filename = filename
         
@@ -141,6 +391,7 @@ class TextEditorWindow(Window):
     
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
+            self.invalidate()
             mouse_pos = pygame.mouse.get_pos()
             window_pos = (mouse_pos[0] - self.x, mouse_pos[1] - self.y)
             
@@ -171,24 +422,16 @@ class TextEditorWindow(Window):
                     self.scroll_y = max(0, self.scroll_y - self.line_height)
                     return True
                 elif event.button == 5:  # Mouse wheel down
-                    max_scroll = max(0, len(self.lines) * self.line_height - (self.height - self.title_bar_height))
+                    max_scroll = max(0, self.buffer.line_count * self.line_height - (self.height - self.title_bar_height))
                     self.scroll_y = min(max_scroll, self.scroll_y + self.line_height)
                     return True
                     
                 # Handle text selection
                 local_y = window_pos[1] - self.title_bar_height + self.scroll_y
                 line_idx = int(local_y // self.line_height)
-                if 0 <= line_idx < len(self.lines):
+                if 0 <= line_idx < self.buffer.line_count:
                     # Calculate character position
-                    local_x = window_pos[0] - 5
-                    char_pos = 0
-                    line = self.lines[line_idx]
-                    for i, char in enumerate(line):
-                        char_width = self.font.render(char, True, self.text_color).get_width()
-                        if local_x < char_width / 2:
-                            break
-                        local_x -= char_width
-                        char_pos = i + 1
+                    char_pos = self._column_at(self.buffer.line(line_idx), window_pos[0] - 5)
                         
                     # Handle multiple clicks and shift-click
                     current_time = pygame.time.get_ticks()
@@ -238,25 +481,26 @@ class TextEditorWindow(Window):
             if event.buttons[0]:  # Left button
                 window_pos = (event.pos[0] - self.x, event.pos[1] - self.y)
                 if window_pos[1] >= self.title_bar_height:
+                    self.invalidate()
                     if self.selection_start is None:
                         self.selection_start = self.cursor_pos.copy()
                     local_y = window_pos[1] - self.title_bar_height + self.scroll_y
-                    line_idx = max(0, min(int(local_y // self.line_height), len(self.lines) - 1))
-                    local_x = window_pos[0] - 5
-                    char_pos = 0
-                    line = self.lines[line_idx]
-                    for i, char in enumerate(line):
-                        char_width = self.font.render(char, True, self.text_color).get_width()
-                        if local_x < char_width / 2:
-                            break
-                        local_x -= char_width
-                        char_pos = i + 1
+                    line_idx = max(0, min(int(local_y // self.line_height), self.buffer.line_count - 1))
+                    char_pos = self._column_at(self.buffer.line(line_idx), window_pos[0] - 5)
                     self.cursor_pos = [line_idx, char_pos]
             super().handle_event(event)
             
         return True
     
     def update(self):
+        # Update cursor blink
+        self.blink_timer += 1
+        if self.blink_timer >= 30:  # Blink every 30 frames
+            self.show_cursor = not self.show_cursor
+            self.blink_timer = 0
+            if self.active:  # The cursor is only drawn in the active editor
+                self.invalidate()
+
         # Handle key repeat for all keys
         if self.held_key is not None:
             current_time = pygame.time.get_ticks()
@@ -270,6 +514,37 @@ class TextEditorWindow(Window):
                         'unicode': self.held_unicode or ''  # Include unicode for letter keys
                     })
                     self.handle_key_input(fake_event)
+
+        # Debounced autosave: a burst of edits turns into one save once typing pauses
+        now = pygame.time.get_ticks()
+        if self.save_job is not None and self.save_job.state == 'failed' and self.saved_buffer is self._saving_buffer:
+            # Still unsaved; back off a full delay before autosave retries
+            self.saved_buffer = None
+            self._last_edit_time = now
+        if self.buffer is not self._seen_buffer:
+            self._seen_buffer = self.buffer
+            self._last_edit_time = now
+        if (self.autosave_delay is not None and self.buffer is not self.saved_buffer
+                and now - self._last_edit_time >= self.autosave_delay
+                and (self.save_job is None or self.save_job.done)):
+            self.save_file()
+
+        self.title = self._status_title()
+
+    def _status_title(self):
+        title = self.base_title
+        if self.buffer is not self.saved_buffer:
+            title += " *"
+        if self.changed_on_disk:
+            title += " (changed on disk)"
+        if self.save_job is not None:
+            if self.save_job.state == 'failed':
+                title += " (save failed)"
+            elif not self.save_job.done:
+                title += " (saving...)"
+            elif time.time() - self.save_job.finished_at < 2:
+                title += " (saved)"
+        return title
     
     def handle_key_input(self, event):
         if event.key == pygame.K_RETURN:
@@ -279,27 +554,23 @@ class TextEditorWindow(Window):
                 self.delete_selection()
             elif self.cursor_pos[1] > 0:
                 # Delete character before cursor
-                line = self.lines[self.cursor_pos[0]]
-                self.lines[self.cursor_pos[0]] = line[:self.cursor_pos[1]-1] + line[self.cursor_pos[1]:]
+                offset = self.cursor_offset()
+                self.buffer = self.buffer.delete(offset - 1, offset)
                 self.cursor_pos[1] -= 1
             elif self.cursor_pos[0] > 0:
-                # Join with previous line
-                prev_line_len = len(self.lines[self.cursor_pos[0]-1])
-                self.lines[self.cursor_pos[0]-1] += self.lines[self.cursor_pos[0]]
-                self.lines.pop(self.cursor_pos[0])
+                # Join with previous line (delete the newline before the cursor)
+                prev_line_len = self.buffer.line_length(self.cursor_pos[0]-1)
+                offset = self.cursor_offset()
+                self.buffer = self.buffer.delete(offset - 1, offset)
                 self.cursor_pos[0] -= 1
                 self.cursor_pos[1] = prev_line_len
         elif event.key == pygame.K_DELETE:
             if self.selection_start is not None:
                 self.delete_selection()
-            elif self.cursor_pos[1] < len(self.lines[self.cursor_pos[0]]):
-                # Delete character after cursor
-                line = self.lines[self.cursor_pos[0]]
-                self.lines[self.cursor_pos[0]] = line[:self.cursor_pos[1]] + line[self.cursor_pos[1]+1:]
-            elif self.cursor_pos[0] < len(self.lines) - 1:
-                # Join with next line
-                self.lines[self.cursor_pos[0]] += self.lines[self.cursor_pos[0]+1]
-                self.lines.pop(self.cursor_pos[0]+1)
+            elif self.cursor_pos[0] < self.buffer.line_count - 1 or self.cursor_pos[1] < self.buffer.line_length(self.cursor_pos[0]):
+                # Delete character after cursor (joins with the next line at the end of a line)
+                offset = self.cursor_offset()
+                self.buffer = self.buffer.delete(offset, offset + 1)
         elif event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
             if event.mod & pygame.KMOD_SHIFT:
                 if self.selection_start is None:
@@ -312,43 +583,44 @@ class TextEditorWindow(Window):
                     self.cursor_pos[1] -= 1
                 elif self.cursor_pos[0] > 0:
                     self.cursor_pos[0] -= 1
-                    self.cursor_pos[1] = len(self.lines[self.cursor_pos[0]])
+                    self.cursor_pos[1] = self.buffer.line_length(self.cursor_pos[0])
             elif event.key == pygame.K_RIGHT:
-                if self.cursor_pos[1] < len(self.lines[self.cursor_pos[0]]):
+                if self.cursor_pos[1] < self.buffer.line_length(self.cursor_pos[0]):
                     self.cursor_pos[1] += 1
-                elif self.cursor_pos[0] < len(self.lines) - 1:
+                elif self.cursor_pos[0] < self.buffer.line_count - 1:
                     self.cursor_pos[0] += 1
                     self.cursor_pos[1] = 0
             elif event.key == pygame.K_UP:
                 if self.cursor_pos[0] > 0:
                     self.cursor_pos[0] -= 1
-                    self.cursor_pos[1] = min(self.cursor_pos[1], len(self.lines[self.cursor_pos[0]]))
+                    self.cursor_pos[1] = min(self.cursor_pos[1], self.buffer.line_length(self.cursor_pos[0]))
             elif event.key == pygame.K_DOWN:
-                if self.cursor_pos[0] < len(self.lines) - 1:
+                if self.cursor_pos[0] < self.buffer.line_count - 1:
                     self.cursor_pos[0] += 1
-                    self.cursor_pos[1] = min(self.cursor_pos[1], len(self.lines[self.cursor_pos[0]]))
+                    self.cursor_pos[1] = min(self.cursor_pos[1], self.buffer.line_length(self.cursor_pos[0]))
         elif event.unicode and event.unicode >= ' ':
             self.insert_text(event.unicode)
             
         self.show_cursor = True
         self.blink_timer = 0
+        self.invalidate()
     
     def insert_text(self, text):
         if self.selection_start is not None:
             self.delete_selection()
         
-        if text == '\n':
-            # Split line at cursor
-            line = self.lines[self.cursor_pos[0]]
-            self.lines[self.cursor_pos[0]] = line[:self.cursor_pos[1]]
-            self.lines.insert(self.cursor_pos[0] + 1, line[self.cursor_pos[1]:])
-            self.cursor_pos[0] += 1
-            self.cursor_pos[1] = 0
+        self.buffer = self.buffer.insert(self.cursor_offset(), text)
+        if '\n' in text:
+            # Cursor ends up on the last inserted line
+            self.cursor_pos[0] += text.count('\n')
+            self.cursor_pos[1] = len(text) - text.rfind('\n') - 1
         else:
-            # Insert character at cursor
-            line = self.lines[self.cursor_pos[0]]
-            self.lines[self.cursor_pos[0]] = line[:self.cursor_pos[1]] + text + line[self.cursor_pos[1]:]
             self.cursor_pos[1] += len(text)
+
+    def cursor_offset(self, pos=None):
+        """Buffer offset of a [line, char] position (the cursor by default)"""
+        line, char = pos or self.cursor_pos
+        return self.buffer.line_start(line) + char
     
     def delete_selection(self):
         if self.selection_start is None:
@@ -360,25 +632,14 @@ class TextEditorWindow(Window):
              self.selection_start[1] > self.cursor_pos[1])):
             self.selection_start, self.cursor_pos = self.cursor_pos, self.selection_start
             
-        if self.selection_start[0] == self.cursor_pos[0]:
-            # Selection on same line
-            line = self.lines[self.selection_start[0]]
-            self.lines[self.selection_start[0]] = (
-                line[:self.selection_start[1]] + line[self.cursor_pos[1]:])
-            self.cursor_pos = self.selection_start
-        else:
-            # Selection spans multiple lines
-            first_line = self.lines[self.selection_start[0]]
-            last_line = self.lines[self.cursor_pos[0]]
-            self.lines[self.selection_start[0]] = (
-                first_line[:self.selection_start[1]] + last_line[self.cursor_pos[1]:])
-            del self.lines[self.selection_start[0]+1:self.cursor_pos[0]+1]
-            self.cursor_pos = self.selection_start
+        # One range delete, however many lines the selection spans
+        self.buffer = self.buffer.delete(self.cursor_offset(self.selection_start), self.cursor_offset())
+        self.cursor_pos = self.selection_start
             
         self.selection_start = None
     
     def select_word(self, line_idx, char_pos):
-        line = self.lines[line_idx]
+        line = self.buffer.line(line_idx)
         # Find word boundaries
         start = char_pos
         while start > 0 and line[start-1].isalnum():
@@ -391,21 +652,35 @@ class TextEditorWindow(Window):
     
     def select_line(self, line_idx):
         self.selection_start = [line_idx, 0]
-        self.cursor_pos = [line_idx, len(self.lines[line_idx])]
+        self.cursor_pos = [line_idx, self.buffer.line_length(line_idx)]
     
     def save_file(self):
         if self.filesystem and self.filename:
-            content = '\n'.join(self.lines)
-            self.filesystem.create_file(self.filename, content)
+            snapshot = self.buffer  # Ropes are immutable, so this is a consistent snapshot
+            self.saved_buffer = snapshot
+            self._saving_buffer = snapshot
+            self.changed_on_disk = False
+            # Joining and writing happen on the writer thread; the UI keeps going
+            self.save_job = self.filesystem.save_file_async(self.filename, snapshot.text)
     
-    def draw(self, screen):
-        super().draw(screen)
-        
-        # Update cursor blink
-        self.blink_timer += 1
-        if self.blink_timer >= 30:  # Blink every 30 frames
-            self.show_cursor = not self.show_cursor
-            self.blink_timer = 0
+    def file_changed(self):
+        """The file was changed by something else: reload it unless that would lose our edits"""
+        if self.buffer is not self.saved_buffer or (self.save_job is not None and not self.save_job.done):
+            self.changed_on_disk = True
+            return
+        try:
+            content = self.filesystem.read_file(self.filename).content
+        except FileNotFoundError:
+            self.changed_on_disk = True
+            return
+        if content == self.buffer.text():
+            return
+        self.buffer = Rope(content)
+        self.saved_buffer = self._seen_buffer = self.buffer
+        self.selection_start = None
+        line = min(self.cursor_pos[0], self.buffer.line_count - 1)
+        self.cursor_pos = [line, min(self.cursor_pos[1], self.buffer.line_length(line))]
+        self.invalidate()
 
     def draw_content(self):
         # Draw text editor background
@@ -415,42 +690,90 @@ class TextEditorWindow(Window):
         # Draw save button with "SAVE" text
         pygame.draw.rect(self.surface, current_theme.button_bg, self.save_button)
         pygame.draw.rect(self.surface, current_theme.accent, self.save_button, 2)  # Green outline
-        save_text = self.font.render('SAVE', True, current_theme.text)
+        save_text = font_cache.render('SAVE', current_theme.text, 24)
         self.surface.blit(save_text, (self.width - 75, 5))
         
-        # Draw text content
-        y = self.title_bar_height + 5 - self.scroll_y
-        for line_idx, line in enumerate(self.lines):
-            if y + self.line_height >= self.title_bar_height:
-                # Draw selection highlight
-                if self.selection_start is not None:
-                    sel_start = self.selection_start
-                    sel_end = self.cursor_pos
-                    if sel_start[0] > sel_end[0] or (sel_start[0] == sel_end[0] and sel_start[1] > sel_end[1]):
-                        sel_start, sel_end = sel_end, sel_start
-                        
-                    if sel_start[0] <= line_idx <= sel_end[0]:
-                        start_x = 5
-                        if line_idx == sel_start[0]:
-                            start_x += self.font.render(line[:sel_start[1]], True, self.text_color).get_width()
-                            
-                        end_x = self.width - 5
-                        if line_idx == sel_end[0]:
-                            end_x = 5 + self.font.render(line[:sel_end[1]], True, self.text_color).get_width()
-                            
-                        pygame.draw.rect(self.surface, current_theme.editor_selection,
-                                       (start_x, y, end_x - start_x, self.line_height))
-                
-                # Draw text
-                text_surface = self.font.render(line, True, current_theme.editor_text)
-                self.surface.blit(text_surface, (5, y))
-                
-                # Draw cursor
-                if line_idx == self.cursor_pos[0] and self.show_cursor and self.active:
-                    cursor_x = 5 + self.font.render(line[:self.cursor_pos[1]], True, self.text_color).get_width()
-                    pygame.draw.line(self.surface, current_theme.editor_cursor,
-                                   (cursor_x, y), (cursor_x, y + self.line_height), 2)
+        # Normalize the selection once for the whole frame
+        sel_start = sel_end = None
+        if self.selection_start is not None:
+            sel_start, sel_end = self.selection_start, self.cursor_pos
+            if sel_start[0] > sel_end[0] or (sel_start[0] == sel_end[0] and sel_start[1] > sel_end[1]):
+                sel_start, sel_end = sel_end, sel_start
+        
+        # Only walk the lines inside the viewport; frame cost depends on window height, not file length
+        first_line = max(0, (self.scroll_y - 5) // self.line_height)
+        y = self.title_bar_height + 5 - self.scroll_y + first_line * self.line_height
+        self.surface.set_clip((0, self.title_bar_height, self.width, self.height - self.title_bar_height))
+        for line_idx, line in enumerate(self.buffer.iter_lines(first_line), first_line):
+            if y >= self.height:
+                break
+            
+            # Draw selection highlight
+            if sel_start is not None and sel_start[0] <= line_idx <= sel_end[0]:
+                start_x = 5
+                if line_idx == sel_start[0]:
+                    start_x += self._column_x(line, sel_start[1])
+                    
+                end_x = self.width - 5
+                if line_idx == sel_end[0]:
+                    end_x = 5 + self._column_x(line, sel_end[1])
+                    
+                pygame.draw.rect(self.surface, current_theme.editor_selection,
+                               (start_x, y, end_x - start_x, self.line_height))
+            
+            # Draw text
+            self.surface.blit(self._render_line(line), (5, y))
+            
+            # Draw cursor
+            if line_idx == self.cursor_pos[0] and self.show_cursor and self.active:
+                cursor_x = 5 + self._column_x(line, self.cursor_pos[1])
+                pygame.draw.line(self.surface, current_theme.editor_cursor,
+                               (cursor_x, y), (cursor_x, y + self.line_height), 2)
             y += self.line_height
+        self.surface.set_clip(None)
+
+    def _prefix_widths(self, line):
+        """Cumulative glyph advances for a line: widths[i] is the x offset of column i"""
+        widths = self._width_cache.get(line)
+        if widths is not None:
+            self._width_cache.move_to_end(line)
+            return widths
+        widths = [0]
+        x = 0
+        for char, metrics in zip(line, self.font.metrics(line)):
+            x += metrics[4] if metrics else self.font.size(char)[0]  # Missing glyphs have no metrics
+            widths.append(x)
+        self._width_cache[line] = widths
+        if len(self._width_cache) > self.max_cached_lines:
+            self._width_cache.popitem(last=False)
+        return widths
+
+    def _column_x(self, line, column):
+        return self._prefix_widths(line)[min(column, len(line))]
+
+    def _column_at(self, line, x):
+        """Column closest to x: binary search for the first character whose midpoint is right of x"""
+        widths = self._prefix_widths(line)
+        low, high = 0, len(line)
+        while low < high:
+            mid = (low + high) // 2
+            if x < (widths[mid] + widths[mid + 1]) / 2:
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def _render_line(self, line):
+        """Rendered surface for a line of text, reused until that text changes"""
+        surface = self._line_cache.get(line)
+        if surface is not None:
+            self._line_cache.move_to_end(line)
+            return surface
+        surface = self.font.render(line, True, current_theme.editor_text)
+        self._line_cache[line] = surface
+        if len(self._line_cache) > self.max_cached_lines:
+            self._line_cache.popitem(last=False)
+        return surface
 
     def close(self):
         print("I was closed.") # This print statement never printed..?
@@ -461,18 +784,59 @@ class Desktop:
     def __init__(self, window_manager, app_manager):
         self.window_manager = window_manager
         self.app_manager = app_manager
-        self.icons = []
         self.taskbar = Taskbar(window_manager.screen.get_width(), 
                              window_manager.screen.get_height())
+        self.icons = IconGrid(window_manager.screen.get_width(), self.taskbar.y)
+        for window in window_manager.windows:
+            self.taskbar.add_window(window)
+        window_manager.add_listener(self.window_changed)
+        self.editor_autosave_delay = None  # ms; set to autosave text editors once typing pauses
         self.refresh_icons()
+        app_manager.filesystem.add_listener(self.files_changed)
+
+    def files_changed(self, paths):
+        """Files changed outside PyOS: resync icons and any editor showing them"""
+        if any("/" not in path for path in paths):
+            self.refresh_icons()
+        for window in self.window_manager.windows:
+            if isinstance(window, TextEditorWindow) and window.filename in paths:
+                window.file_changed()
 
     def refresh_icons(self):
-        self.icons = []
-        files = self.app_manager.list_files()
-        for i, (name, file_type) in enumerate(files):
-            x = 20 + (i % 5) * 100
-            y = 20 + (i // 5) * 100
-            self.icons.append(FileIcon(name, x, y, file_type))
+        self.icons.set_files(self.app_manager.list_files())
+        self.window_manager.compositor.damage_all()
+
+    def scroll_icons(self, rows):
+        if self.icons.scroll(rows):
+            self.window_manager.compositor.damage(self.icons.rect)
+
+    def window_changed(self, window, opened):
+        """A window opened or closed: add or drop just its taskbar button"""
+        compositor = self.window_manager.compositor
+        compositor.damage(self.taskbar.damage_rect)
+        if opened:
+            self.taskbar.add_window(window)
+        else:
+            self.taskbar.remove_window(window)
+        compositor.damage(self.taskbar.damage_rect)
+
+    def restore_last_deleted(self):
+        filesystem = self.app_manager.filesystem
+        entries = filesystem.list_trash()
+        if not entries:
+            return
+        try:
+            filesystem.restore_file(entries[0].entry_id)
+            self.refresh_icons()
+        except Exception as e:
+            print(f"Error restoring file: {str(e)}")
+
+    def update(self):
+        self.app_manager.filesystem.process_changes()
+
+        # Redraw taskbar buttons whose window changed its title
+        for rect in self.taskbar.sync_titles():
+            self.window_manager.compositor.damage(rect)
 
     def is_point_over_window(self, pos):
         # Check if the point is over any window
@@ -483,87 +847,70 @@ class Desktop:
         return False
 
     def handle_event(self, event):
+        """Returns True if the taskbar took the event, so windows shouldn't see it"""
         # Handle taskbar events first
         if self.taskbar.handle_event(event, self.window_manager):
-            return
+            return True
 
         if event.type == pygame.MOUSEBUTTONDOWN:
             pos = pygame.mouse.get_pos()
             # Only handle clicks above taskbar and not over windows
             if pos[1] < self.taskbar.y and not self.is_point_over_window(pos):
-                for icon in self.icons:
-                    if icon.rect.collidepoint(pos):
-                        if event.button == 3 and pygame.key.get_mods() & pygame.KMOD_SHIFT:  # Right click + SHIFT
-                            # Delete the file
-                            try:
-                                self.app_manager.filesystem.delete_file(icon.name)
-                                self.refresh_icons()  # Refresh icons to remove the deleted file
-                            except Exception as e:
-                                print(f"Error deleting file: {str(e)}")
-                        elif event.button == 1:  # Left click
-                            self.open_file(icon.name, icon.file_type)
-
-    def open_file(self, filename, file_type):
+                if event.button in (4, 5):  # Mouse wheel scrolls the icons a row at a time
+                    self.scroll_icons(-1 if event.button == 4 else 1)
+                    return
+                icon = self.icons.icon_at(pos)
+                if icon is not None:
+                    if event.button == 3 and pygame.key.get_mods() & pygame.KMOD_SHIFT:  # Right click + SHIFT
+                        # Delete the file
+                        try:
+                            self.app_manager.filesystem.delete_file(icon.name)
+                            self.refresh_icons()  # Refresh icons to remove the deleted file
+                        except Exception as e:
+                            print(f"Error deleting file: {str(e)}")
+                    elif event.button == 1:  # Left click (+ SHIFT runs apps in their own process)
+                        isolated = bool(pygame.key.get_mods() & pygame.KMOD_SHIFT)
+                        self.open_file(icon.name, icon.file_type, isolated)
+
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+            # Page through the icons while the pointer is over the desktop
+            if not self.is_point_over_window(pygame.mouse.get_pos()):
+                page = self.icons.visible_rows
+                self.scroll_icons(-page if event.key == pygame.K_PAGEUP else page)
+
+    def open_file(self, filename, file_type, isolated=False):
         if file_type == "py":
-            result = self.app_manager.execute_file(filename)
-            if isinstance(result, str):  # If it's a Python file path
-                terminal = TerminalWindow(f"Terminal - {filename}", 100, 100, 600, 400)
+            terminal = TerminalWindow(f"Terminal - {filename}", 100, 100, 600, 400)
+            terminal.output_stream = ScriptOutput(terminal.output_queue)
+            # Runs in the script runner's worker pool, streaming output into the terminal
+            run = self.app_manager.execute_file(filename, terminal.output_stream)
+            if isinstance(run, ScriptRun):
+                terminal.attach_run(run)
                 self.window_manager.create_window(terminal)
-                
-                def run_script():
-                    # Redirect stdout to capture output
-                    old_stdout = sys.stdout
-                    output_buffer = io.StringIO()
-                    sys.stdout = output_buffer
-                    
-                    try:
-                        # Create namespace with everything except pygame
-                        namespace = {
-                            'psutil': __import__('psutil'),
-                            'random': __import__('random'),
-                            'math': __import__('math'),
-                            'time': __import__('time'),
-                            'sys': sys,
-                            'io': io,
-                            'os': __import__('os'),
-                            '__name__': '__main__',
-                            '__file__': result,
-                            '__builtins__': __builtins__,
-                            'api': self.window_manager,  # Pass window manager for API access
-                        }
-                        
-                        with open(result, 'r') as file:
-                            exec(file.read(), namespace, namespace)
-                    except Exception as e:
-                        print(f"Error: {str(e)}")
-                    finally:
-                        # Restore stdout and get output
-                        sys.stdout = old_stdout
-                        output = output_buffer.getvalue()
-                        terminal.output_queue.put(output)
-                
-                # Run the script in a separate thread
-                Thread(target=run_script, daemon=True).start()
         elif file_type == "pya":
             app_code = self.app_manager.execute_file(filename)
             if isinstance(app_code, str):  # If we got the app code
                 app_window = PyAppWindow(f"PyOS App - {filename}", 100, 100, 800, 600, 
-                                      app_code, self.window_manager)
+                                      app_code, self.window_manager,
+                                      isolated or self.window_manager.isolate_apps)
                 self.window_manager.create_window(app_window)
         else:
             content = self.app_manager.get_file_content(filename)
-            if content:
+            if isinstance(content, memoryview):
+                print(f"{filename} is a binary file and can't be opened in the editor")
+            elif content:
                 window = TextEditorWindow(filename, 100, 100, 400, 300, content, 
-                                        self.app_manager.filesystem, filename)
+                                        self.app_manager.filesystem, filename,
+                                        autosave_delay=self.editor_autosave_delay)
                 self.window_manager.create_window(window)
 
     def draw(self):
-        # Draw icons
-        for icon in self.icons:
-            icon.draw(self.window_manager.screen)
-            
-        # Update taskbar window buttons
-        self.taskbar.update_window_buttons(self.window_manager.windows)
+        # Draw icons in view
+        self.icons.draw(self.window_manager.screen, self.window_manager.compositor.clip_rect)
         
         # Draw taskbar
-        self.taskbar.draw(self.window_manager.screen)
\ No newline at end of file
+        self.taskbar.draw(self.window_manager.screen)
+
+    def draw_overlay(self):
+        # The taskbar's window menu goes on top of the windows
+        self.taskbar.draw_menu(self.window_manager.screen)
\ No newline at end of file
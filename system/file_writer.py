@@ -0,0 +1,262 @@
+import os
+import queue
+import tempfile
+import threading
+import time
+
+# Read once at import, while nothing else can be racing on the process-wide umask
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def match_mode(fd, real_path):
+    """mkstemp creates 0600 files and os.replace keeps that mode, so give the temp file the
+    permissions of the file it replaces (or the umask default for a new file) first"""
+    try:
+        mode = os.stat(real_path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    if hasattr(os, 'fchmod'):
+        os.fchmod(fd, mode)
+
+
+def atomic_write(real_path, content):
+    """Write to a temp file next to real_path, fsync it, then rename it into place.
+    A crash at any point leaves either the old file or the new one, never half of it."""
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{real_path.name}.", suffix=".tmp", dir=real_path.parent)
+    except FileNotFoundError:
+        # Only create the parent when it's missing, instead of a mkdir per write
+        real_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{real_path.name}.", suffix=".tmp", dir=real_path.parent)
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(content, (bytes, bytearray, memoryview)) else 'w') as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+            match_mode(file.fileno(), real_path)
+        os.replace(tmp_path, real_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class FileHandle:
+    """File object that runs a callback once it is closed"""
+    def __init__(self, file, on_close=None):
+        self._file = file
+        self._on_close = on_close
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        if self._on_close is not None:
+            self._on_close()
+
+
+class AtomicFile(FileHandle):
+    """Write handle on a temp file that replaces the real file only when closed cleanly"""
+    def __init__(self, real_path, mode, on_close=None):
+        self._real_path = real_path
+        try:
+            fd, self._tmp_path = tempfile.mkstemp(prefix=f".{real_path.name}.", suffix=".tmp", dir=real_path.parent)
+        except FileNotFoundError:
+            real_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, self._tmp_path = tempfile.mkstemp(prefix=f".{real_path.name}.", suffix=".tmp", dir=real_path.parent)
+        super().__init__(os.fdopen(fd, mode), on_close)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.discard()  # Leave the real file as it was
+        else:
+            self.close()
+        return False
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        match_mode(self._file.fileno(), self._real_path)
+        self._file.close()
+        os.replace(self._tmp_path, self._real_path)
+        if self._on_close is not None:
+            self._on_close()
+
+    def discard(self):
+        if not self._file.closed:
+            self._file.close()
+            try:
+                os.unlink(self._tmp_path)
+            except OSError:
+                pass
+
+
+def open_real(real_path, mode='rb', on_close=None):
+    """open()-style handle on a real file; 'w' modes write atomically, other writes call on_close"""
+    if 'w' in mode and '+' not in mode:
+        return AtomicFile(real_path, mode, on_close)
+    if any(flag in mode for flag in 'wax+'):
+        if 'r' not in mode:
+            real_path.parent.mkdir(parents=True, exist_ok=True)
+        return FileHandle(open(real_path, mode), on_close)
+    return open(real_path, mode)
+
+
+class SaveJob:
+    """A queued background save; poll state from the UI thread"""
+    def __init__(self, path, produce_content, on_done):
+        self.path = path
+        self.produce_content = produce_content  # Called on the writer thread
+        self.on_done = on_done  # Called on the writer thread with the written content
+        self.state = 'pending'  # pending, saving, saved, failed
+        self.error = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.state in ('saved', 'failed')
+
+
+class FileWriter:
+    """Single background thread that performs saves off the UI thread"""
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, real_path, produce_content, on_done=None):
+        job = SaveJob(real_path, produce_content, on_done)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+        return job
+
+    def wait(self):
+        """Block until every submitted save has finished"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            job.state = 'saving'
+            try:
+                content = job.produce_content()
+                atomic_write(job.path, content)
+                if job.on_done is not None:
+                    job.on_done(content)
+                job.state = 'saved'
+            except Exception as e:
+                job.error = str(e)
+                job.state = 'failed'
+                print(f"Error saving {job.path}: {e}")
+            job.finished_at = time.time()
+            self._queue.task_done()
+
+
+class WriteBackCache:
+    """Deferred writes: the latest content per path is flushed by a background thread once
+    it has sat for flush_delay seconds, so repeated writes to one path cost one disk write"""
+    def __init__(self, flush_delay=0.5):
+        self.flush_delay = flush_delay
+        self._pending = {}  # Key -> (real_path, content, on_done, queued_at)
+        self._writing = set()  # Keys being written right now
+        self._cond = threading.Condition()
+        self._flush_now = False
+        self._thread = None
+
+    def write(self, key, real_path, content, on_done=None):
+        """Queue content for real_path. on_done(content, latest) runs once it is on disk;
+        latest is False if a newer write to the same key is already queued."""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            queued_at = self._pending[key][3] if key in self._pending else time.time()
+            self._pending[key] = (real_path, content, on_done, queued_at)  # Replaces any older write
+            self._cond.notify_all()
+
+    def is_pending(self, key):
+        """True while content for key is queued or being written"""
+        with self._cond:
+            return key in self._pending or key in self._writing
+
+    def discard(self, key):
+        """Drop a pending write (the path is being written some other way)"""
+        with self._cond:
+            self._pending.pop(key, None)
+
+    def flush(self, key=None):
+        """Write pending content now (one path, or everything) and wait until it's on disk"""
+        with self._cond:
+            while key is not None and key in self._writing:
+                self._cond.wait(0.1)  # Let an older version land first
+            if key is not None and key in self._pending:
+                # Write it on this thread; nobody else will touch it once it leaves _pending
+                real_path, content, on_done, _ = self._pending.pop(key)
+                self._writing.add(key)
+            else:
+                real_path = None
+                if key is None:
+                    self._flush_now = True
+                    self._cond.notify_all()
+        if real_path is not None:
+            self._write(key, real_path, content, on_done)
+        with self._cond:
+            while (self._pending and key is None) or key in self._writing or (key is None and self._writing):
+                self._cond.wait(0.1)
+            if key is None:
+                self._flush_now = False
+
+    def _write(self, key, real_path, content, on_done):
+        try:
+            atomic_write(real_path, content)
+            if on_done is not None:
+                with self._cond:
+                    latest = key not in self._pending  # No newer version queued behind this one
+                on_done(content, latest)
+        except Exception as e:
+            print(f"Error writing {real_path}: {e}")
+        finally:
+            with self._cond:
+                self._writing.discard(key)
+                self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.time()
+                    due = [key for key, item in self._pending.items() if key not in self._writing
+                           and (self._flush_now or now - item[3] >= self.flush_delay)]
+                    if due:
+                        break
+                    oldest = min((item[3] for item in self._pending.values()), default=None)
+                    self._cond.wait(None if oldest is None else max(0.01, oldest + self.flush_delay - now))
+                batch = [(key,) + self._pending.pop(key)[:3] for key in due]
+                self._writing.update(due)
+            for key, real_path, content, on_done in batch:
+                self._write(key, real_path, content, on_done)
@@ -1,15 +1,60 @@
 import os
 import json
+import mmap
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
 from pathlib import Path
 import time
+from .file_writer import FileWriter, WriteBackCache, atomic_write, open_real
+from .fs_watcher import FileSystemWatcher, RESCAN
+from .trash import Trash
+from .snapshots import SnapshotStore
+from .search_index import SearchIndex, SearchResult, make_snippet
+from .async_io import AsyncFileIO
+
+# Extensions whose content is exposed as bytes rather than decoded text
+BINARY_TYPES = {"png", "jpg", "jpeg", "gif", "bmp", "ico", "wav", "ogg", "mp3", "ttf", "otf",
+                "bin", "dat", "sav", "db", "zip", "gz", "npy", "pkl", "pyc"}
+
+SYSTEM_DIR = ".pyos"  # Under the real root; holds PyOS's own bookkeeping and never shows up as files
+MANIFEST_VERSION = 1
+MMAP_MIN_BYTES = 1024 * 1024  # Smaller binary files are simply read into memory
+
+def hash_content(content):
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.sha256(content).hexdigest()
 
 class VirtualFile:
-    def __init__(self, name, content="", file_type="txt"):
+    def __init__(self, name, content="", file_type="txt", size=None, last_modified=0, binary=None):
+        if isinstance(content, (bytes, bytearray)):
+            content = memoryview(bytes(content))
         self.name = name
-        self.content = content
+        self.content = content  # None until first read; FileSystem.read_file loads it
         self.file_type = file_type
         self.metadata = {}
-        self.last_modified = 0  # Track last modification time
+        self.content_hash = None  # sha256 of the content, once known
+        self.size = (content.nbytes if isinstance(content, memoryview) else len(content)) if size is None else size
+        self.last_modified = last_modified  # Track last modification time
+        # Binary content is a read-only memoryview, over an mmap of the real file once loaded from disk
+        if binary is None:
+            binary = isinstance(content, memoryview) or file_type in BINARY_TYPES
+        self.binary = binary
+
+    def __getstate__(self):
+        # Going to another process: the mapping can't follow, so send a copy of the bytes
+        state = self.__dict__.copy()
+        if isinstance(self.content, memoryview):
+            state["content"] = self.content.tobytes()
+        return state
+
+    def __setstate__(self, state):
+        if isinstance(state["content"], bytes):
+            state["content"] = memoryview(state["content"])
+        self.__dict__.update(state)
+
+FileEntry = namedtuple("FileEntry", ["name", "file_type", "size", "last_modified"])
 
 class VirtualDirectory:
     def __init__(self, name):
@@ -18,130 +63,702 @@ class VirtualDirectory:
         self.directories = {}
 
 class FileSystem:
-    def __init__(self):
+    def __init__(self, max_cached_bytes=64 * 1024 * 1024, watch=True, write_back=False, flush_delay=0.5):
         self.root = VirtualDirectory("root")
+        self._directories = {"": self.root}  # Canonical path -> directory, so lookups don't walk the tree
         self._real_root = Path("filesystem")
         self._real_root.mkdir(exist_ok=True)
         self.current_dir = self.root
         self._file_timestamps = {}  # Track file modification times
+        self.writer = FileWriter()  # Background saves
+        # Write-back mode: create_file returns at once and a background thread writes the
+        # latest content of each path after flush_delay seconds
+        self.write_back = WriteBackCache(flush_delay) if write_back else None
+        self.io = AsyncFileIO(self)  # read_async / write_async / list_async for apps
+
+        # File content is loaded on first read and the coldest is dropped past this budget
+        self.max_cached_bytes = max_cached_bytes
+        self._cached = OrderedDict()  # Path -> VirtualFile with content loaded
+        self._cached_bytes = 0
+        self._mapped = {}  # Path -> memoryview over an mmap, closed before the file is replaced
+        # Guards the tree, the directory index, the content cache and the timestamps: the
+        # writer, write-back and async I/O threads update them too. Disk I/O happens outside it.
+        self._lock = threading.RLock()
+        self._listeners = []  # Called with the set of paths changed outside PyOS
+        self._unannounced = set()  # Paths restored off the UI thread, for dispatch_completions
+        self.watcher = None
+        self._manifest_path = self._real_root / SYSTEM_DIR / "manifest.json"
+        self._manifest_dirty = False
+        self.boot_stats = {}
+        self.trash = Trash(self._real_root / SYSTEM_DIR / "trash")
+        self.trash.start()
+        self.snapshots = SnapshotStore(self._real_root, self._real_root / SYSTEM_DIR / "snapshots", {SYSTEM_DIR})
         self._load_filesystem()
+        self.search_index = SearchIndex(self._real_root / SYSTEM_DIR / "search_index.json", self._read_text_for_index)
+        self.search_index.start(self._text_signatures())
+        if watch:
+            self.watcher = FileSystemWatcher(self._real_root)
+            self.watcher.start()
 
     def _load_filesystem(self):
-        """Load the real filesystem into virtual filesystem"""
-        if not self._real_root.exists():
+        """Build the virtual tree from directory metadata only; no file is read or written.
+        Entries whose size and mtime still match the manifest keep what was learned about
+        them last time (type, binary-ness, content hash)."""
+        start = time.perf_counter()
+        manifest = self._read_manifest()
+        stats = {"entries": 0, "changed": 0}
+        self._scan_directory(self._real_root, self.root, "", manifest, stats)
+        if set(manifest) - set(self._file_timestamps):
+            self._manifest_dirty = True  # Files were removed while we were away
+        if self._manifest_dirty:
+            self.save_manifest()
+        self.boot_stats = {
+            "mode": "warm" if manifest else "cold",
+            "seconds": time.perf_counter() - start,
+            "entries": stats["entries"],
+            "changed": stats["changed"],
+        }
+        print(f"Filesystem {self.boot_stats['mode']} boot: {self.boot_stats['entries']} files, "
+              f"{self.boot_stats['changed']} changed, {self.boot_stats['seconds'] * 1000:.1f} ms")
+
+    def _scan_directory(self, real_dir, directory, prefix, manifest=None, stats=None):
+        with os.scandir(real_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not prefix and entry.name == SYSTEM_DIR:
+                        continue
+                    sub = self._directory(prefix + entry.name, create=True)
+                    self._scan_directory(entry.path, sub, prefix + entry.name + "/", manifest, stats)
+                elif entry.is_file() and not self._is_temp_file(Path(entry.name)):
+                    key = prefix + entry.name
+                    stat = entry.stat()
+                    known = manifest.get(key) if manifest else None
+                    if known is not None and known[1] == stat.st_size and known[2] == stat.st_mtime:
+                        virtual_file = VirtualFile(entry.name, None, known[0], stat.st_size, stat.st_mtime, known[3])
+                        virtual_file.content_hash = known[4]
+                    else:
+                        suffix = Path(entry.name).suffix
+                        virtual_file = VirtualFile(entry.name, None, suffix[1:] if suffix else "txt",
+                                                   stat.st_size, stat.st_mtime)
+                        self._manifest_dirty = True
+                        if stats is not None:
+                            stats["changed"] += 1
+                    directory.files[entry.name] = virtual_file
+                    self._file_timestamps[key] = stat.st_mtime
+                    if stats is not None:
+                        stats["entries"] += 1
+
+    def _read_manifest(self):
+        """Path -> [file_type, size, mtime, binary, content_hash] from the last run, or {}"""
+        try:
+            with open(self._manifest_path) as file:
+                data = json.load(file)
+            if data.get("version") == MANIFEST_VERSION:
+                return data["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def save_manifest(self):
+        """Write what we know about every file so the next boot can skip re-deriving it"""
+        files = {}
+        with self._lock:
+            for dir_key, directory in self._directories.items():
+                prefix = dir_key + "/" if dir_key else ""
+                for name, virtual_file in directory.files.items():
+                    files[prefix + name] = [virtual_file.file_type, virtual_file.size, virtual_file.last_modified,
+                                            virtual_file.binary, virtual_file.content_hash]
+            self._manifest_dirty = False
+        atomic_write(self._manifest_path, json.dumps({"version": MANIFEST_VERSION, "files": files}))
+
+    def close(self):
+        """Stop background work and persist the manifest; call on shutdown"""
+        self.stop_watching()
+        self.trash.stop()
+        self.io.shutdown()
+        self.sync()
+        if self._manifest_dirty:
+            self.save_manifest()
+        self.search_index.wait()
+        if self.search_index.dirty:
+            self.search_index.save(self._text_signatures())
+
+    @staticmethod
+    def _normalize(path):
+        """Canonical form of a virtual path: no leading, trailing or doubled slashes"""
+        return "/".join(part for part in path.split("/") if part and part != ".")
+
+    def _directory(self, key, create=False):
+        """Directory for a canonical path, from the index; None if it doesn't exist"""
+        directory = self._directories.get(key)
+        if directory is None and create:
+            parent_key, _, name = key.rpartition("/")
+            parent = self._directory(parent_key, create=True)
+            directory = VirtualDirectory(name)
+            parent.directories[name] = directory
+            self._directories[key] = directory
+        return directory
+
+    def _parent_directory(self, key):
+        parent_key, _, name = key.rpartition("/")
+        parent = self._directories.get(parent_key)
+        if parent is None:
+            raise FileNotFoundError(f"Directory not found: {parent_key}")
+        return parent, name
+
+    def _remove_directory(self, key):
+        """Drop a directory and everything below it from the tree and the index"""
+        directory = self._directories.pop(key, None)
+        if directory is None:
+            return False
+        parent_key, _, name = key.rpartition("/")
+        self._directories[parent_key].directories.pop(name, None)
+        stack = [(key, directory)]
+        while stack:
+            dir_key, current = stack.pop()
+            self._directories.pop(dir_key, None)
+            for file_name in current.files:
+                self._release_mapping(f"{dir_key}/{file_name}")
+                self._uncache_content(f"{dir_key}/{file_name}")
+                self._file_timestamps.pop(f"{dir_key}/{file_name}", None)
+                self.search_index.remove(f"{dir_key}/{file_name}")
+            stack.extend((f"{dir_key}/{sub_name}", sub) for sub_name, sub in current.directories.items())
+        return True
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def process_changes(self):
+        """Apply changes the watcher saw on disk to the virtual tree and notify listeners.
+        Call from the UI thread; returns the paths that changed."""
+        if self.watcher is None:
+            return set()
+        changed = self.watcher.poll()
+        if RESCAN in changed:
+            changed = (changed - {RESCAN}) | self._known_paths()
+        applied = {path for path in changed if self._apply_change(path)}
+        if applied:
+            for callback in list(self._listeners):
+                callback(applied)
+        return applied
+
+    def _known_paths(self):
+        """Every path in the virtual tree or on disk, for a full resync"""
+        paths = set()
+        for dir_path, dir_names, file_names in os.walk(self._real_root):
+            rel = Path(dir_path).relative_to(self._real_root)
+            paths.update((rel / name).as_posix() for name in dir_names + file_names)
+        with self._lock:
+            stack = [(self.root, "")]
+            while stack:
+                directory, prefix = stack.pop()
+                paths.update(prefix + name for name in directory.files)
+                for name, sub in directory.directories.items():
+                    paths.add(prefix + name)
+                    stack.append((sub, prefix + name + "/"))
+        return paths
+
+    def _apply_change(self, path):
+        """Bring one path of the virtual tree in line with disk; True if anything changed"""
+        key = self._normalize(path)
+        parent_key, _, name = key.rpartition("/")
+        if not name or self._is_temp_file(Path(name)) or key.split("/")[0] == SYSTEM_DIR:
+            return False
+        if self.write_back is not None and self.write_back.is_pending(key):
+            return False  # Disk is about to get our newer content; keep it in the tree
+        with self._lock:
+            self._manifest_dirty = True
+            real_path = self._real_root / key
+            try:
+                stat = real_path.stat()
+            except OSError:
+                stat = None
+
+            if stat is None:
+                # Removed on disk
+                parent = self._directories.get(parent_key)
+                self._release_mapping(key)
+                if parent is not None and parent.files.pop(name, None) is not None:
+                    self._uncache_content(key)
+                    self._file_timestamps.pop(key, None)
+                    self.search_index.remove(key)
+                    return True
+                return self._remove_directory(key)
+            if real_path.is_dir():
+                if key in self._directories:
+                    return False  # Its contents report their own changes
+                self._scan_directory(real_path, self._directory(key, create=True), key + "/")
+                for file_key, virtual_file in self._iter_files(key):
+                    if not virtual_file.binary:
+                        self.search_index.update(file_key)
+                return True
+            parent = self._directory(parent_key, create=True)
+            if name in parent.files and self._file_timestamps.get(key) == stat.st_mtime:
+                return False  # Our own write, or already up to date
+            # New or modified: drop stale content, it is read again on next access
+            self._release_mapping(key)
+            suffix = real_path.suffix
+            parent.files[name] = VirtualFile(name, None, suffix[1:] if suffix else "txt", stat.st_size, stat.st_mtime)
+            self._uncache_content(key)
+            self._file_timestamps[key] = stat.st_mtime
+            self.search_index.update(key)
+            return True
+
+    def _iter_files(self, dir_key=""):
+        """(path, VirtualFile) for every file at or below a directory"""
+        stack = [(dir_key, self._directories[dir_key])]
+        while stack:
+            current_key, directory = stack.pop()
+            prefix = current_key + "/" if current_key else ""
+            for name, virtual_file in list(directory.files.items()):
+                yield prefix + name, virtual_file
+            stack.extend((prefix + name, sub) for name, sub in list(directory.directories.items()))
+
+    def _text_signatures(self):
+        """(size, mtime) of every text file, which the search index checks its entries against"""
+        with self._lock:
+            return {key: (virtual_file.size, virtual_file.last_modified)
+                    for key, virtual_file in self._iter_files() if not virtual_file.binary}
+
+    def _read_text_for_index(self, key):
+        # Runs on the indexing thread, so it goes to disk directly instead of through read_file
+        real_path = self._real_root / key
+        if real_path.suffix[1:] in BINARY_TYPES:
+            return None
+        try:
+            if real_path.stat().st_size > self.search_index.max_file_bytes:
+                return None
+            return real_path.read_text()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def search(self, query, limit=20):
+        """Full-text search over text files: SearchResult(path, score, snippet) tuples, best first.
+        Files written a moment ago may take a short while to show up."""
+        results = []
+        for key, score in self.search_index.search(query, limit):
+            try:
+                content = self.read_file(key).content
+            except (FileNotFoundError, UnicodeDecodeError):
+                continue
+            snippet = make_snippet(content, query) if isinstance(content, str) else ""
+            results.append(SearchResult(key, score, snippet))
+        return results
+
+    def _cache_content(self, key, directory, virtual_file):
+        """Mark a file's content as recently used and evict cold content past the budget"""
+        with self._lock:
+            old = self._cached.pop(key, None)
+            if old is not None:
+                self._cached_bytes -= old[1].size
+            self._cached[key] = (directory, virtual_file)
+            self._cached_bytes += virtual_file.size
+            while self._cached_bytes > self.max_cached_bytes and len(self._cached) > 1:
+                _, (cold_dir, cold) = self._cached.popitem(last=False)
+                self._cached_bytes -= cold.size
+                # Swap in a metadata-only entry; anyone still holding the old file keeps its content
+                if cold_dir.files.get(cold.name) is cold:
+                    cold_dir.files[cold.name] = self._without_content(cold)
+
+    @staticmethod
+    def _without_content(virtual_file):
+        stripped = VirtualFile(virtual_file.name, None, virtual_file.file_type,
+                               virtual_file.size, virtual_file.last_modified, virtual_file.binary)
+        stripped.content_hash = virtual_file.content_hash
+        return stripped
+
+    def _release_mapping(self, key):
+        """Close our mmap of a file before it is replaced, trashed or truncated: Windows
+        can't rename a mapped file, and truncating one under a reader raises SIGBUS.
+        Caller holds the lock."""
+        view = self._mapped.pop(key, None)
+        if view is None:
             return
+        parent_key, _, name = key.rpartition("/")
+        parent = self._directories.get(parent_key)
+        if parent is not None and name in parent.files and parent.files[name].content is view:
+            parent.files[name] = self._without_content(parent.files[name])
+            self._uncache_content(key)
+        self._close_view(view)
+
+    @staticmethod
+    def _close_view(view):
+        mapping = view.obj
+        view.release()
+        try:
+            mapping.close()
+        except BufferError:
+            pass  # Someone still holds a slice of it; it closes once they let go
 
-        for path in self._real_root.rglob("*"):
-            if path.is_file():
-                rel_path = path.relative_to(self._real_root)
-                self.create_file(str(rel_path), path.read_text(), path.suffix[1:] if path.suffix else "txt")
+    def _uncache_content(self, key):
+        with self._lock:
+            old = self._cached.pop(key, None)
+            if old is not None:
+                self._cached_bytes -= old[1].size
 
-    def _check_file_modified(self, path):
+    @staticmethod
+    def _is_temp_file(path):
+        """Leftover from an atomic write that was interrupted"""
+        return path.name.startswith(".") and path.name.endswith(".tmp")
+
+    def _check_file_modified(self, key):
         """Check if real file has been modified since last read"""
-        real_path = self._real_root / path
-        if real_path.exists():
-            current_mtime = real_path.stat().st_mtime
-            last_mtime = self._file_timestamps.get(str(path), 0)
-            return current_mtime > last_mtime
-        return False
+        try:
+            current_mtime = (self._real_root / key).stat().st_mtime
+        except OSError:
+            return False
+        return current_mtime > self._file_timestamps.get(key, 0)
     
-    def _update_timestamp(self, path):
-        """Update stored timestamp for file"""
-        real_path = self._real_root / path
-        if real_path.exists():
-            self._file_timestamps[str(path)] = real_path.stat().st_mtime
+    def _update_timestamp(self, key, virtual_file=None):
+        """Update stored timestamp for file, and the virtual file's size and mtime to match disk"""
+        try:
+            stat = (self._real_root / key).stat()
+        except OSError:
+            self._file_timestamps.pop(key, None)
+            return
+        self._file_timestamps[key] = stat.st_mtime
+        if virtual_file is not None:
+            virtual_file.size = stat.st_size
+            virtual_file.last_modified = stat.st_mtime
 
     def create_file(self, path, content="", file_type="txt"):
         """Create a file in both virtual and real filesystem"""
-        parts = path.strip("/").split("/")
-        filename = parts[-1]
-        dir_path = parts[:-1]
+        key = self._normalize(path)
+        parent_key, _, filename = key.rpartition("/")
+        virtual_file = VirtualFile(filename, content, file_type)
+        virtual_file.content_hash = hash_content(content)
 
-        current = self.root
-        for dir_name in dir_path:
-            if dir_name not in current.directories:
-                current.directories[dir_name] = VirtualDirectory(dir_name)
-            current = current.directories[dir_name]
+        with self._lock:
+            current = self._directory(parent_key, create=True)
+            self._release_mapping(key)
+            current.files[filename] = virtual_file
+            self._manifest_dirty = True
+            if isinstance(content, str):
+                self.search_index.update(key, content)
+            else:
+                self.search_index.remove(key)
 
-        virtual_file = VirtualFile(filename, content, file_type)
-        current.files[filename] = virtual_file
+            if self.write_back is not None:
+                def on_done(_, latest):
+                    # Only the newest version of the file becomes evictable, once it is on disk
+                    with self._lock:
+                        if latest and current.files.get(filename) is virtual_file:
+                            self._update_timestamp(key, virtual_file)
+                            self._cache_content(key, current, virtual_file)
+                        else:
+                            self._update_timestamp(key)
+
+                self.write_back.write(key, self._real_root / key, content, on_done)
+                return virtual_file
 
         # Create real file
-        real_path = self._real_root / Path(*dir_path) / filename
-        real_path.parent.mkdir(parents=True, exist_ok=True)
-        real_path.write_text(content)
+        atomic_write(self._real_root / key, content)
 
-        self._update_timestamp(path)
+        with self._lock:
+            self._update_timestamp(key, virtual_file)
+            self._cache_content(key, current, virtual_file)
         return virtual_file
 
+    def read_async(self, path, callback=None):
+        """read_file on an I/O thread. Returns a Future; callback(future) runs on the UI thread
+        at the start of the frame after the read finished."""
+        return self.io.read(path, callback)
+
+    def write_async(self, path, content, file_type="txt", callback=None):
+        """create_file on an I/O thread; content may be a callable that builds it there"""
+        return self.io.write(path, content, file_type, callback)
+
+    def list_async(self, path="", sort_by="name", reverse=False, offset=0, limit=None, callback=None):
+        """list_files on an I/O thread"""
+        return self.io.list(path, sort_by, reverse, offset, limit, callback)
+
+    def create_snapshot_async(self, name=None, callback=None):
+        """create_snapshot on an I/O thread; the future's result is the snapshot id"""
+        return self.io.create_snapshot(name, callback)
+
+    def restore_snapshot_async(self, snapshot_id, callback=None):
+        """restore_snapshot on an I/O thread. Listeners are told about the changed paths on
+        the UI thread, before the callback runs."""
+        return self.io.restore_snapshot(snapshot_id, callback)
+
+    def dispatch_completions(self):
+        """Deliver finished async calls to their callbacks; the main loop calls this every frame"""
+        with self._lock:
+            restored, self._unannounced = self._unannounced, set()
+        if restored:
+            for callback in list(self._listeners):
+                callback(restored)
+        self.io.dispatch()
+
+    def flush(self, path=None):
+        """Write pending write-back content to disk now (one path, or all) and wait for it"""
+        if self.write_back is not None:
+            self.write_back.flush(None if path is None else self._normalize(path))
+
+    def sync(self):
+        """Wait until everything written through PyOS, background saves included, is on disk"""
+        self.flush()
+        self.writer.wait()
+
+    def save_file_async(self, path, produce_content, file_type=None):
+        """Save a file on the background writer thread. produce_content is called on
+        that thread to build the text, so even joining a large buffer stays off the UI.
+        Returns a SaveJob to poll."""
+        key = self._normalize(path)
+        parent_key, _, filename = key.rpartition("/")
+        real_path = self._real_root / key
+        if file_type is None:
+            file_type = real_path.suffix[1:] if real_path.suffix else "txt"
+        with self._lock:
+            current = self._directory(parent_key, create=True)
+            self._release_mapping(key)
+        if self.write_back is not None:
+            self.write_back.discard(key)  # This save supersedes it
+
+        def on_done(content):
+            # Mirror the saved content in the virtual filesystem
+            virtual_file = VirtualFile(filename, content, file_type)
+            virtual_file.content_hash = hash_content(content)
+            with self._lock:
+                current.files[filename] = virtual_file
+                self._update_timestamp(key, virtual_file)
+                self._manifest_dirty = True
+                self._cache_content(key, current, virtual_file)
+            self.search_index.update(key, content)
+
+        return self.writer.submit(real_path, produce_content, on_done)
+
     def delete_file(self, path):
-        """Delete a file from both virtual and real filesystem"""
-        parts = path.strip("/").split("/")
-        filename = parts[-1]
-        dir_path = parts[:-1]
-
-        current = self.root
-        for dir_name in dir_path:
-            if dir_name not in current.directories:
-                raise FileNotFoundError(f"Directory not found: {dir_name}")
-            current = current.directories[dir_name]
-
-        if filename not in current.files:
-            raise FileNotFoundError(f"File not found: {filename}")
-
-        # Move to /filesystem/$bin
-        bin_path = self._real_root / "bin" / filename
-        bin_path.parent.mkdir(parents=True, exist_ok=True)
-        bin_path.write_text(current.files[filename].content)
-        bin_path.unlink()  # Delete the original file
-        # This has now deleted the file from the real filesystem
-        # Now delete from virtual filesystem
-        del current.files[filename]
-        # Update the timestamp
-        self._update_timestamp(path)
-            
+        """Move a file to the trash (a rename, however big the file is).
+        Returns the TrashEntry to restore it with, or None if it was already gone from disk."""
+        key = self._normalize(path)
+        self.flush(key)  # The trash should hold the latest version; not under the lock, it waits on the writer
+        with self._lock:
+            current, filename = self._parent_directory(key)
+            if filename not in current.files:
+                raise FileNotFoundError(f"File not found: {filename}")
+
+            self._release_mapping(key)
+            try:
+                entry = self.trash.add(self._real_root / key, key, current.files[filename].size)
+            except FileNotFoundError:
+                entry = None
+            # Now delete from virtual filesystem
+            del current.files[filename]
+            self._uncache_content(key)
+            self._file_timestamps.pop(key, None)
+            self._manifest_dirty = True
+            self.search_index.remove(key)
+        return entry
+
+    def list_trash(self):
+        """Trashed files as TrashEntry(entry_id, path, deleted_at, size), newest first"""
+        return self.trash.entries()
 
+    def restore_file(self, entry_id, path=None):
+        """Put a trashed file back at its original path (or at path); returns the path"""
+        key = self._normalize(path or self.trash.get(entry_id).path)
+        self.trash.restore(entry_id, self._real_root / key)
+        self._apply_change(key)
+        return key
+
+    def create_snapshot(self, name=None):
+        """Record the whole tree in the snapshot store. Only files whose size or mtime changed
+        since the last snapshot are read; identical content is stored once."""
+        self.sync()  # Deferred writes belong in the snapshot
+        return self.snapshots.create(name)
+
+    def list_snapshots(self):
+        """SnapshotInfo(snapshot_id, created, files, size) tuples, newest first"""
+        return self.snapshots.list()
+
+    def restore_snapshot(self, snapshot_id, notify=True):
+        """Bring the tree back to a snapshot. Only differing files are rewritten; files the
+        snapshot doesn't have go to the trash. Returns the paths that changed. With notify
+        False, listeners are told by the next dispatch_completions instead of right away."""
+        self.sync()
+        with self._lock:
+            for key in list(self._mapped):
+                self._release_mapping(key)  # Any of them may be rewritten or trashed
+
+        def remove(key):
+            real_path = self._real_root / key
+            self.trash.add(real_path, key, real_path.stat().st_size)
+
+        with self.trash.batch():  # One index write for the whole restore
+            changed = self.snapshots.restore(snapshot_id, remove)
+        applied = {key for key in changed if self._apply_change(key)}
+        if applied and not notify:
+            with self._lock:
+                self._unannounced |= applied
+        elif applied:
+            for callback in list(self._listeners):
+                callback(applied)
+        return changed
+
+    def delete_snapshot(self, snapshot_id):
+        """Forget a snapshot and free the content only it was keeping"""
+        self.snapshots.delete(snapshot_id)
+        self.snapshots.collect_garbage()
+
+    def purge_trash(self, max_age=None, max_bytes=None):
+        """Permanently delete old trash now instead of waiting for the background purge"""
+        return self.trash.purge(max_age, max_bytes)
 
     def read_file(self, path):
         """Read a file from the virtual filesystem"""
-        parts = path.strip("/").split("/")
-        filename = parts[-1]
-        dir_path = parts[:-1]
+        key = self._normalize(path)
+        with self._lock:
+            current, filename = self._parent_directory(key)
+            virtual_file = current.files.get(filename)
+            if virtual_file is None:
+                raise FileNotFoundError(f"File not found: {filename}")
+            # Load on first read; without a watcher, also reload if the real file has been modified
+            if virtual_file.content is not None and not (self.watcher is None and self._check_file_modified(key)):
+                self._cache_content(key, current, virtual_file)
+                return virtual_file
+            binary = virtual_file.binary
+            stale = virtual_file.content  # None, or what a reload replaces
 
-        current = self.root
-        for dir_name in dir_path:
-            if dir_name not in current.directories:
-                raise FileNotFoundError(f"Directory not found: {dir_name}")
-            current = current.directories[dir_name]
+        # Read outside the lock so a big file doesn't hold up other threads
+        real_path = self._real_root / key
+        content = content_hash = None
+        if not binary:
+            try:
+                content = real_path.read_text()
+                content_hash = hash_content(content)
+            except UnicodeDecodeError:
+                binary = True
+        if binary:
+            content = self._map_file(real_path)
+
+        mapped = isinstance(content, memoryview) and isinstance(content.obj, mmap.mmap)
+        with self._lock:
+            if virtual_file.content is not stale:
+                # Another thread loaded it meanwhile; use theirs
+                if mapped:
+                    self._close_view(content)
+                self._cache_content(key, current, virtual_file)
+                return virtual_file
+            if virtual_file.binary != binary or not binary:
+                self._manifest_dirty = True
+            virtual_file.binary = binary
+            if self._mapped.get(key) is stale and stale is not None:
+                self._close_view(self._mapped.pop(key))  # The file changed under the old mapping
+            if mapped:
+                self._mapped[key] = content
+            virtual_file.content = content
+            virtual_file.content_hash = content_hash
+            self._update_timestamp(key, virtual_file)
+            self._cache_content(key, current, virtual_file)
+        return virtual_file
 
-        if filename not in current.files:
-            raise FileNotFoundError(f"File not found: {filename}")
+    @staticmethod
+    def _map_file(real_path):
+        """Read-only memoryview of a binary file: over an mmap for big files (no copy),
+        over plain bytes for small ones, which then hold no mapping open"""
+        with open(real_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < MMAP_MIN_BYTES:
+                return memoryview(file.read())  # Also covers empty files, which can't be mapped
+            return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
 
-        # Check if real file has been modified
-        if self._check_file_modified(path):
-            # Reload file content from disk
-            real_path = self._real_root / path
-            current.files[filename].content = real_path.read_text()
-            self._update_timestamp(path)
+    def file_hash(self, path):
+        """sha256 of a file's content; computed once (streamed from disk) and kept in the manifest"""
+        key = self._normalize(path)
+        with self._lock:
+            current, filename = self._parent_directory(key)
+            virtual_file = current.files.get(filename)
+            if virtual_file is None:
+                raise FileNotFoundError(f"File not found: {filename}")
+            if virtual_file.content_hash is not None and not (self.watcher is None and self._check_file_modified(key)):
+                return virtual_file.content_hash
+        digest = hashlib.sha256()
+        with open(self._real_root / key, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        with self._lock:
+            virtual_file.content_hash = digest.hexdigest()
+            self._update_timestamp(key, virtual_file)
+            self._manifest_dirty = True
+        return virtual_file.content_hash
 
-        return current.files[filename]
+    def real_path(self, path):
+        """Location of a virtual path on the real disk (with any deferred write flushed)"""
+        self.flush(path)
+        return str(self._real_root / self._normalize(path))
+
+    def open_file(self, path, mode="rb"):
+        """open()-style streaming handle. Writing modes ('w') replace the file atomically when
+        the handle is closed; the virtual tree picks up the new size and type at that point."""
+        key = self._normalize(path)
+        parent_key, _, filename = key.rpartition("/")
+        real_path = self._real_root / key
+        self.flush(key)  # Streams go to disk directly, so deferred content must land first
+        if not any(flag in mode for flag in "wax+"):
+            with self._lock:
+                current, _ = self._parent_directory(key)
+                if filename not in current.files:
+                    raise FileNotFoundError(f"File not found: {filename}")
+            return open_real(real_path, mode)
+
+        with self._lock:
+            current = self._directory(parent_key, create=True)
+            self._release_mapping(key)  # Writers replace or truncate the file
+
+        def on_close():
+            stat = real_path.stat()
+            suffix = real_path.suffix
+            with self._lock:
+                current.files[filename] = VirtualFile(filename, None, suffix[1:] if suffix else "txt",
+                                                      stat.st_size, stat.st_mtime, binary="b" in mode or None)
+                self._uncache_content(key)
+                self._file_timestamps[key] = stat.st_mtime
+                self._manifest_dirty = True
+            self.search_index.update(key)
+
+        return open_real(real_path, mode, on_close)
 
     def list_directory(self, path=""):
         """List contents of a directory"""
-        if not path:
-            current = self.root
-        else:
-            parts = path.strip("/").split("/")
-            current = self.root
-            for dir_name in parts:
-                if dir_name not in current.directories:
-                    raise FileNotFoundError(f"Directory not found: {dir_name}")
-                current = current.directories[dir_name]
-
-        return {
-            "directories": list(current.directories.keys()),
-            "files": list(current.files.keys())
-        }
+        key = self._normalize(path)
+        with self._lock:
+            current = self._directories.get(key)
+            if current is None:
+                raise FileNotFoundError(f"Directory not found: {key}")
+
+            return {
+                "directories": list(current.directories.keys()),
+                "files": list(current.files.keys())
+            }
+
+    _SORT_KEYS = {
+        "name": lambda entry: entry.name.lower(),
+        "type": lambda entry: (entry.file_type, entry.name.lower()),
+        "size": lambda entry: entry.size,
+        "mtime": lambda entry: entry.last_modified,
+    }
+
+    def list_files(self, path="", sort_by="name", reverse=False, offset=0, limit=None):
+        """List a directory's files as FileEntry(name, file_type, size, last_modified) tuples.
+        Comes straight from the directory metadata, so no file content is read."""
+        key = self._normalize(path)
+        with self._lock:
+            current = self._directories.get(key)
+            if current is None:
+                raise FileNotFoundError(f"Directory not found: {key}")
+            entries = [FileEntry(f.name, f.file_type, f.size, f.last_modified) for f in current.files.values()]
+        entries.sort(key=self._SORT_KEYS[sort_by], reverse=reverse)
+        end = None if limit is None else offset + limit
+        return entries[offset:end]
 
     def execute_file(self, path):
         """Execute a file if it's executable"""
@@ -149,7 +766,8 @@ class FileSystem:
         if file.file_type == "pya":  # PyOS App format
             return file.content  # Return the code instead of executing it
         elif file.file_type == "py":  # Standard Python file
-            real_path = self._real_root / path
+            self.flush(path)  # The script runs from the real file
+            real_path = self._real_root / self._normalize(path)
             if real_path.exists():
                 return str(real_path)
             return False
@@ -0,0 +1,56 @@
+import pygame
+from collections import OrderedDict
+
+class FontCache:
+    """Shared font registry and LRU cache of rendered text surfaces"""
+    def __init__(self, max_surfaces=512):
+        self.max_surfaces = max_surfaces
+        self._fonts = {}  # (face, size) -> pygame.font.Font
+        self._surfaces = OrderedDict()  # (face, size, text, color, antialias) -> Surface
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, face=None, size=24):
+        """Get a font, loading it from disk only the first time it is asked for"""
+        key = (face, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(face, size)
+            self._fonts[key] = font
+        return font
+
+    def render(self, text, color, size=24, face=None, antialias=True):
+        """Render text, reusing the surface if the same string was rendered before"""
+        key = (face, size, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.get_font(face, size).render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_surfaces:
+            self._surfaces.popitem(last=False)  # Evict least recently used
+        return surface
+
+    def get_stats(self):
+        """Get cache counters for the performance overlay / task manager"""
+        total = self.hits + self.misses
+        return {
+            'fonts': len(self._fonts),
+            'surfaces': len(self._surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def clear(self):
+        """Drop all cached surfaces (e.g. after a theme change)"""
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+# Global font cache instance
+font_cache = FontCache()
@@ -0,0 +1,185 @@
+import os
+import sys
+import queue
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+import time
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+RESCAN = ''  # Path reported when events were lost and the whole tree needs checking
+
+
+class _Inotify:
+    """Recursive inotify watch over a directory tree, through libc"""
+    def __init__(self, root):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self._dirs = {}  # Watch descriptor -> path relative to root
+        self._add_tree('')
+
+    def _add_tree(self, rel):
+        full = os.path.join(self.root, rel)
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(full), WATCH_MASK)
+        if wd < 0:
+            return
+        self._dirs[wd] = rel
+        try:
+            with os.scandir(full) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        self._add_tree(os.path.join(rel, entry.name))
+        except OSError:
+            pass
+
+    def read(self, timeout):
+        """Changed paths from the events that arrive within timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0').decode(errors='surrogateescape')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changed.add(RESCAN)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None:
+                continue
+            rel = os.path.join(parent, name) if name else parent
+            changed.add(rel.replace(os.sep, '/'))
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(rel)  # New subdirectory: watch it too
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Poller:
+    """Fallback for platforms without inotify: diff directory snapshots"""
+    def __init__(self, root, interval):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.time() + interval
+
+    def _scan(self):
+        snapshot = {}
+        stack = ['']
+        while stack:
+            rel = stack.pop()
+            try:
+                with os.scandir(os.path.join(self.root, rel)) as entries:
+                    for entry in entries:
+                        path = f"{rel}/{entry.name}" if rel else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            snapshot[path] = None
+                            stack.append(path)
+                        else:
+                            stat = entry.stat()
+                            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass
+        return snapshot
+
+    def read(self, timeout):
+        # Walk the tree once per interval, however often we're asked
+        wait = self._next_scan - time.time()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(0.0, wait))
+        self._next_scan = time.time() + self.interval
+        snapshot = self._scan()
+        old = self._snapshot
+        self._snapshot = snapshot
+        return {path for path in old.keys() | snapshot.keys() if old.get(path, 0) != snapshot.get(path, 0)}
+
+    def close(self):
+        pass
+
+
+class FileSystemWatcher:
+    """Watches the real filesystem on a background thread and batches external changes.
+    The UI thread collects the batches with poll() and applies them itself."""
+    def __init__(self, root, batch_delay=0.2, poll_interval=1.0):
+        self.root = str(root)
+        self.batch_delay = batch_delay  # Seconds to keep gathering once something changed
+        self.poll_interval = poll_interval
+        self.batches = queue.Queue()
+        self._running = False
+        self._thread = None
+        self._source = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._source = None
+        if sys.platform.startswith('linux'):
+            try:
+                self._source = _Inotify(self.root)
+            except OSError as e:
+                print(f"inotify unavailable, polling instead: {e}")
+        if self._source is None:
+            self._source = _Poller(self.root, self.poll_interval)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    def poll(self):
+        """All paths changed since the last poll, relative to root"""
+        changed = set()
+        while True:
+            try:
+                changed |= self.batches.get_nowait()
+            except queue.Empty:
+                return changed
+
+    def _run(self):
+        while self._running:
+            changed = self._source.read(0.5)
+            if not changed:
+                continue
+            # Coalesce a burst (e.g. a copy of many files) into one batch
+            deadline = time.time() + self.batch_delay
+            while self._running and time.time() < deadline:
+                changed |= self._source.read(max(0.0, deadline - time.time()))
+            self.batches.put(changed)
@@ -0,0 +1,211 @@
+import random
+
+MAX_CHUNK = 512  # Characters per leaf chunk
+
+
+class _Node:
+    """Immutable treap node holding one chunk of text; subtrees know their length and newline count"""
+    __slots__ = ('left', 'right', 'chunk', 'priority', 'length', 'lines', 'chunk_lines')
+
+    def __init__(self, chunk, priority, left=None, right=None, chunk_lines=None):
+        self.chunk = chunk
+        self.priority = priority
+        self.left = left
+        self.right = right
+        self.chunk_lines = chunk.count('\n') if chunk_lines is None else chunk_lines
+        self.length = len(chunk) + (left.length if left else 0) + (right.length if right else 0)
+        self.lines = self.chunk_lines + (left.lines if left else 0) + (right.lines if right else 0)
+
+    def with_children(self, left, right):
+        return _Node(self.chunk, self.priority, left, right, self.chunk_lines)
+
+
+def _merge(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        return a.with_children(a.left, _merge(a.right, b))
+    return b.with_children(_merge(a, b.left), b.right)
+
+
+def _split(node, offset):
+    """Split into (first offset characters, the rest)"""
+    if node is None:
+        return None, None
+    left_len = node.left.length if node.left else 0
+    if offset <= left_len:
+        a, b = _split(node.left, offset)
+        return a, node.with_children(b, node.right)
+    offset -= left_len
+    if offset >= len(node.chunk):
+        a, b = _split(node.right, offset - len(node.chunk))
+        return node.with_children(node.left, a), b
+    # Split inside this node's chunk
+    head = _Node(node.chunk[:offset], node.priority, node.left, None)
+    tail = _Node(node.chunk[offset:], random.random(), None, None)
+    return head, _merge(tail, node.right)
+
+
+def _build(text):
+    """Build a treap from text in linear time (Cartesian tree over random priorities)"""
+    stack = []  # Right spine; each node's right child is implicitly the next one up the stack
+    for start in range(0, len(text), MAX_CHUNK):
+        node = _Node(text[start:start + MAX_CHUNK], random.random())
+        last = None
+        while stack and stack[-1].priority < node.priority:
+            top = stack.pop()
+            last = top.with_children(top.left, last)
+        stack.append(node.with_children(last, None) if last is not None else node)
+    # Fold the right spine back up
+    root = None
+    while stack:
+        top = stack.pop()
+        root = top.with_children(top.left, root)
+    return root
+
+
+def _insert_in_chunk(node, offset, text):
+    """Insert into the chunk covering offset if it stays small; returns None if it doesn't fit"""
+    left_len = node.left.length if node.left else 0
+    if offset < left_len:
+        new_left = _insert_in_chunk(node.left, offset, text)
+        return None if new_left is None else node.with_children(new_left, node.right)
+    offset -= left_len
+    if offset <= len(node.chunk):
+        if len(node.chunk) + len(text) > MAX_CHUNK:
+            return None
+        chunk = node.chunk[:offset] + text + node.chunk[offset:]
+        return _Node(chunk, node.priority, node.left, node.right)
+    new_right = _insert_in_chunk(node.right, offset - len(node.chunk), text)
+    return None if new_right is None else node.with_children(node.left, new_right)
+
+
+class Rope:
+    """Persistent text buffer: edits are O(log n) and return a new Rope, so any version is a free snapshot"""
+    __slots__ = ('_root',)
+
+    def __init__(self, text="", _root=None):
+        self._root = _root if _root is not None or not text else _build(text)
+
+    def __len__(self):
+        return self._root.length if self._root else 0
+
+    @property
+    def line_count(self):
+        return (self._root.lines if self._root else 0) + 1
+
+    def insert(self, offset, text):
+        if not text:
+            return self
+        if self._root is None:
+            return Rope(text)
+        if len(text) <= MAX_CHUNK:
+            root = _insert_in_chunk(self._root, offset, text)
+            if root is not None:
+                return Rope(_root=root)
+        left, right = _split(self._root, offset)
+        return Rope(_root=_merge(_merge(left, _build(text)), right))
+
+    def delete(self, start, end):
+        """Remove characters [start, end)"""
+        if end <= start:
+            return self
+        left, rest = _split(self._root, start)
+        _, right = _split(rest, end - start)
+        return Rope(_root=_merge(left, right))
+
+    def _newline_offset(self, k):
+        """Offset of the k-th newline (1-based)"""
+        node = self._root
+        pos = 0
+        while node is not None:
+            left_lines = node.left.lines if node.left else 0
+            if k <= left_lines:
+                node = node.left
+                continue
+            k -= left_lines
+            pos += node.left.length if node.left else 0
+            if k <= node.chunk_lines:
+                index = -1
+                for _ in range(k):
+                    index = node.chunk.index('\n', index + 1)
+                return pos + index
+            k -= node.chunk_lines
+            pos += len(node.chunk)
+            node = node.right
+        raise IndexError("line out of range")
+
+    def line_start(self, line):
+        """Offset of the first character of a line"""
+        return 0 if line == 0 else self._newline_offset(line) + 1
+
+    def line_end(self, line):
+        """Offset just past the last character of a line (before its newline)"""
+        return len(self) if line >= self.line_count - 1 else self._newline_offset(line + 1)
+
+    def line(self, line):
+        return self.slice(self.line_start(line), self.line_end(line))
+
+    def line_length(self, line):
+        return self.line_end(line) - self.line_start(line)
+
+    def slice(self, start, end):
+        parts = []
+        self._collect(self._root, start, end, parts)
+        return ''.join(parts)
+
+    def _collect(self, node, start, end, parts):
+        if node is None or start >= end:
+            return
+        left_len = node.left.length if node.left else 0
+        if start < left_len:
+            self._collect(node.left, start, min(end, left_len), parts)
+        chunk_end = left_len + len(node.chunk)
+        if start < chunk_end and end > left_len:
+            parts.append(node.chunk[max(0, start - left_len):min(len(node.chunk), end - left_len)])
+        if end > chunk_end:
+            self._collect(node.right, max(0, start - chunk_end), end - chunk_end, parts)
+
+    def chunks(self, start=0):
+        """Yield the text from offset start onwards, chunk by chunk"""
+        stack = []
+        node = self._root
+        while node is not None:
+            left_len = node.left.length if node.left else 0
+            if start < left_len:
+                stack.append((node, start - left_len))
+                node = node.left
+            else:
+                start -= left_len
+                if start < len(node.chunk):
+                    stack.append((node, start))
+                    break
+                start -= len(node.chunk)
+                node = node.right
+        else:
+            return
+
+        while stack:
+            node, skip = stack.pop()
+            yield node.chunk[max(0, skip):]
+            child = node.right
+            while child is not None:
+                stack.append((child, 0))
+                child = child.left
+
+    def iter_lines(self, start_line=0):
+        """Yield lines from start_line to the end without splitting the whole text"""
+        if start_line >= self.line_count:
+            return
+        partial = ''
+        for chunk in self.chunks(self.line_start(start_line)):
+            pieces = chunk.split('\n')
+            pieces[0] = partial + pieces[0]
+            partial = pieces.pop()
+            yield from pieces
+        yield partial
+
+    def text(self):
+        return ''.join(self.chunks())
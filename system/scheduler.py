@@ -0,0 +1,45 @@
+import pygame
+
+class FrameScheduler:
+    """Paces app windows against their own frame budget instead of blocking the OS frame"""
+    def __init__(self, default_fps=60):
+        self.default_fps = default_fps
+        self._entries = {}  # window -> {'interval', 'next_due', 'last_run'} (times in ms)
+
+    def register(self, window, fps=None):
+        now = pygame.time.get_ticks()
+        self._entries[window] = {
+            'interval': 1000.0 / (fps or self.default_fps),
+            'next_due': now,  # First frame right away
+            'last_run': now
+        }
+
+    def unregister(self, window):
+        self._entries.pop(window, None)
+
+    def set_rate(self, window, fps):
+        """Change a window's target frame rate"""
+        entry = self._entries.get(window)
+        if entry is not None and fps > 0:
+            entry['interval'] = 1000.0 / fps
+
+    def wake(self, window):
+        """Run a window's next frame as soon as possible (e.g. after input)"""
+        entry = self._entries.get(window)
+        if entry is not None:
+            entry['next_due'] = min(entry['next_due'], pygame.time.get_ticks())
+
+    def update(self):
+        """Mark which windows are due this frame and hand them their delta_time"""
+        now = pygame.time.get_ticks()
+        for window, entry in self._entries.items():
+            if now < entry['next_due']:
+                window.frame_due = False
+                continue
+            window.frame_due = True
+            window.frame_delta = (now - entry['last_run']) / 1000.0
+            entry['last_run'] = now
+            entry['next_due'] += entry['interval']
+            if entry['next_due'] <= now:
+                # Fell behind (or was woken early) - don't try to catch up with a burst of frames
+                entry['next_due'] = now + entry['interval']
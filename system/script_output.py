@@ -0,0 +1,59 @@
+import io
+import queue
+
+class ScriptOutput(io.TextIOBase):
+    """Line-buffered output channel from one running script to its terminal"""
+    def __init__(self, output_queue, max_chunk_chars=4096):
+        super().__init__()
+        self.queue = output_queue  # Bounded, so a chatty script blocks instead of eating memory
+        self.max_chunk_chars = max_chunk_chars
+        self._partial = ''  # Text after the last newline
+        self.abandoned = False  # Reader went away (terminal closed)
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if self.abandoned:
+            return len(text)
+        data = self._partial + text
+        cut = data.rfind('\n')
+        if cut == -1:
+            self._partial = data
+            if len(data) >= self.max_chunk_chars:
+                # Very long line without a newline yet - don't let it grow forever
+                self._partial = ''
+                self._put(data)
+            return len(text)
+
+        self._partial = data[cut + 1:]
+        complete = data[:cut]
+        while len(complete) > self.max_chunk_chars:
+            split = complete.rfind('\n', 0, self.max_chunk_chars)
+            if split <= 0:
+                self._put(complete[:self.max_chunk_chars])
+                complete = complete[self.max_chunk_chars:]
+            else:
+                self._put(complete[:split])
+                complete = complete[split + 1:]
+        self._put(complete)
+        return len(text)
+
+    def flush(self):
+        if self._partial:
+            self._put(self._partial)
+            self._partial = ''
+
+    def abandon(self):
+        """Stop delivering output; writes from the script are dropped from now on"""
+        self.abandoned = True
+
+    def _put(self, chunk):
+        # Backpressure: wait for the terminal to catch up, unless it was closed
+        while not self.abandoned:
+            try:
+                self.queue.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
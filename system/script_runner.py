@@ -0,0 +1,252 @@
+import io
+import os
+import sys
+import time
+import threading
+import multiprocessing
+from collections import deque
+import psutil
+from .app_host import _Channel, RemoteAppAPI, dispatch_call
+from .window_manager import PyOSAppAPI
+
+class _PipeWriter(io.TextIOBase):
+    """Worker-side stdout: sends whole lines to the OS process"""
+    def __init__(self, conn):
+        super().__init__()
+        self._conn = conn
+        self._partial = ''
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        data = self._partial + text
+        cut = data.rfind('\n')
+        if cut == -1:
+            self._partial = data
+        else:
+            self._partial = data[cut + 1:]
+            self._conn.send(('out', data[:cut + 1]))
+        return len(text)
+
+    def flush(self):
+        if self._partial:
+            self._conn.send(('out', self._partial))
+            self._partial = ''
+
+
+def _worker_main(conn):
+    """Entry point of a script worker process: runs one script at a time"""
+    channel = _Channel(conn)
+    writer = _PipeWriter(conn)
+    sys.stdout = writer
+    sys.stderr = writer
+    while True:
+        try:
+            path = conn.recv()
+        except EOFError:
+            break
+        if path is None:
+            break
+
+        error = None
+        try:
+            # Create namespace with everything except pygame
+            namespace = {
+                'psutil': psutil,
+                'random': __import__('random'),
+                'math': __import__('math'),
+                'time': time,
+                'sys': sys,
+                'io': io,
+                'os': os,
+                '__name__': '__main__',
+                '__file__': path,
+                '__builtins__': __builtins__,
+                'api': RemoteAppAPI(channel),  # windows, get_performance, terminate_window, filesystem
+            }
+            with open(path, 'r') as file:
+                exec(file.read(), namespace, namespace)
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                error = f"exit code {e.code}"
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Error: {str(e)}")
+        writer.flush()
+        conn.send(('done', error))
+
+
+class ScriptRun:
+    """One requested run of a .py script"""
+    def __init__(self, runner, path, output, timeout):
+        self.runner = runner
+        self.path = path
+        self.output = output  # File-like object receiving the script's stdout
+        self.timeout = timeout  # Seconds of wall time before the run is killed
+        self.state = 'queued'  # queued, running, finished, failed, killed, timed out
+        self.error = None
+        self.started_at = None
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self._worker = None
+        self._cpu_start = 0.0
+
+    @property
+    def done(self):
+        return self.state not in ('queued', 'running')
+
+    def kill(self):
+        self.runner.kill(self)
+
+    def status_text(self):
+        """Short status for terminal titles"""
+        if self.state == 'queued':
+            return "queued"
+        if self.state == 'running':
+            return f"running {int(time.time() - self.started_at)}s"
+        return f"{self.state}: {self.wall_time:.2f}s wall, {self.cpu_time:.2f}s CPU"
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.run = None
+
+    def stop(self, timeout=1.0):
+        """SIGTERM, then SIGKILL if the script ignores it; reaps the process either way"""
+        self.process.terminate()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    def cpu_time(self):
+        try:
+            times = psutil.Process(self.process.pid).cpu_times()
+            return times.user + times.system
+        except psutil.Error:
+            return 0.0
+
+
+class ScriptRunner:
+    """Runs .py scripts in a pool of worker processes, off the UI thread and its GIL"""
+    def __init__(self, filesystem, max_workers=None, default_timeout=None, window_manager=None):
+        self.filesystem = filesystem  # Served to scripts through api.filesystem
+        self.api = PyOSAppAPI(window_manager, filesystem)  # What script api calls run against
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.default_timeout = default_timeout
+        self._ctx = multiprocessing.get_context('spawn')
+        self._workers = []
+        self._pending = deque()
+        self._lock = threading.Condition()
+        self._running = True
+        self._supervisor = None
+
+    def submit(self, path, output, timeout=None):
+        """Queue a script; it starts as soon as a worker is free"""
+        run = ScriptRun(self, path, output, timeout or self.default_timeout)
+        with self._lock:
+            if self._supervisor is None:
+                self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+                self._supervisor.start()
+            self._pending.append(run)
+            self._lock.notify_all()
+        return run
+
+    def kill(self, run, state='killed'):
+        """Stop a queued or running script"""
+        with self._lock:
+            if run.state == 'queued':
+                self._pending.remove(run)
+                run.state = state
+            elif run.state == 'running':
+                worker = run._worker
+                self._finish(run, state, worker.cpu_time())
+                self._workers.remove(worker)
+                self._lock.notify_all()
+                # The reader thread sees EOF and exits; waiting out a stubborn script
+                # happens off this thread so the UI doesn't stall
+                threading.Thread(target=worker.stop, daemon=True).start()
+
+    def shutdown(self):
+        with self._lock:
+            self._running = False
+            for run in list(self._pending):
+                run.state = 'killed'
+            self._pending.clear()
+            workers, self._workers = self._workers, []
+            for worker in workers:
+                if worker.run is not None:
+                    self._finish(worker.run, 'killed', worker.cpu_time())
+                worker.process.terminate()
+            self._lock.notify_all()
+        for worker in workers:
+            worker.stop()
+
+    def _finish(self, run, state, cpu_now):
+        # Caller holds the lock
+        run.state = state
+        run.wall_time = time.time() - run.started_at
+        run.cpu_time = max(0.0, cpu_now - run._cpu_start)
+        run._worker.run = None
+
+    def _supervise(self):
+        """Start queued runs on free workers and enforce timeouts"""
+        with self._lock:
+            while self._running:
+                while self._pending:
+                    worker = next((w for w in self._workers if w.run is None), None)
+                    if worker is None:
+                        if len(self._workers) >= self.max_workers:
+                            break
+                        worker = _Worker(self._ctx)
+                        self._workers.append(worker)
+                        threading.Thread(target=self._read_worker, args=(worker,), daemon=True).start()
+                    self._start(worker, self._pending.popleft())
+
+                now = time.time()
+                for worker in list(self._workers):
+                    run = worker.run
+                    if run is not None and run.timeout and now - run.started_at > run.timeout:
+                        self.kill(run, 'timed out')
+                self._lock.wait(0.1)
+
+    def _start(self, worker, run):
+        # Caller holds the lock
+        worker.run = run
+        run._worker = worker
+        run.state = 'running'
+        run.started_at = time.time()
+        run._cpu_start = worker.cpu_time()
+        worker.conn.send(run.path)
+
+    def _read_worker(self, worker):
+        """Forward one worker's output and API calls; runs on its own thread so backpressure stays per-script"""
+        while True:
+            try:
+                msg = worker.conn.recv()
+            except (EOFError, OSError):
+                return  # Worker was killed
+            run = worker.run
+            if msg[0] == 'out':
+                if run is not None:
+                    run.output.write(msg[1])
+            elif msg[0] == 'call':
+                worker.conn.send(self._dispatch(*msg[1:]))
+            elif msg[0] == 'done':
+                if run is not None:
+                    run.output.flush()  # Outside the lock: flushing may wait on the terminal
+                with self._lock:
+                    if run is not None and run.state == 'running':
+                        run.error = msg[1]
+                        self._finish(run, 'failed' if msg[1] else 'finished', worker.cpu_time())
+                    self._lock.notify_all()
+
+    def _dispatch(self, target, name, args, kwargs):
+        # Runs on the worker's reader thread; FileSystem locks its own state, so this can't
+        # race the UI thread (the same holds for the async I/O pool)
+        return dispatch_call(self.api, target, name, args, kwargs)
@@ -0,0 +1,44 @@
+class Scrollback:
+    """Fixed-capacity ring buffer of terminal lines; appending never shifts existing lines"""
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._lines = [None] * capacity
+        self._start = 0  # Slot of the oldest line
+        self._count = 0
+        self.total = 0  # Lines ever appended; gives every line a stable absolute number
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """Line by position, 0 being the oldest line still kept"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("scrollback index out of range")
+        return self._lines[(self._start + index) % self.capacity]
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self._lines[(self._start + index) % self.capacity]
+
+    @property
+    def first_number(self):
+        """Absolute number of the oldest line still kept"""
+        return self.total - self._count
+
+    def append(self, line):
+        self._lines[(self._start + self._count) % self.capacity] = line
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity  # Overwrote the oldest line
+        self.total += 1
+
+    def clear(self):
+        self._lines = [None] * self.capacity
+        self._start = 0
+        self._count = 0
+
+    def text(self):
+        return '\n'.join(self)
@@ -0,0 +1,157 @@
+import re
+import json
+import math
+import queue
+import threading
+from collections import Counter, namedtuple
+from .file_writer import atomic_write
+
+SearchResult = namedtuple("SearchResult", ["path", "score", "snippet"])
+
+INDEX_VERSION = 1
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted index over text files, kept up to date incrementally.
+    Updates are queued and applied on a background thread, so writing a file never waits on
+    tokenizing it; queries only touch the postings of their own terms."""
+    def __init__(self, index_path, read_text, max_file_bytes=4 * 1024 * 1024):
+        self.index_path = index_path
+        self.read_text = read_text  # path -> text, or None if the file is gone or not text
+        self.max_file_bytes = max_file_bytes
+        self._docs = {}  # Path -> Counter of terms
+        self._lengths = {}  # Path -> number of terms
+        self._postings = {}  # Term -> {path: term frequency}
+        self._total_length = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._ready = threading.Event()
+        self.dirty = False
+
+    def start(self, signatures):
+        """Load the persisted index on the background thread, then reindex files that changed
+        while we were away. signatures maps every text file in the tree to its (size, mtime)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(signatures,), daemon=True)
+            self._thread.start()
+
+    def _restore(self, signatures):
+        saved = self._load()
+        with self._lock:
+            for path, (size, mtime, terms) in saved.items():
+                if path in signatures and tuple(signatures[path]) == (size, mtime):
+                    self._add(path, Counter(terms))
+            if len(saved) != len(self._docs):
+                self.dirty = True  # Stale entries were dropped
+            missing = [path for path in signatures if path not in self._docs]
+        for path in missing:
+            self.update(path)
+
+    def _load(self):
+        try:
+            with open(self.index_path) as file:
+                data = json.load(file)
+            if data.get("version") == INDEX_VERSION:
+                return data["docs"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def save(self, signatures):
+        """Persist the index; signatures as for start()"""
+        with self._lock:
+            docs = {path: [*signatures[path], terms] for path, terms in self._docs.items() if path in signatures}
+            self.dirty = False
+        atomic_write(self.index_path, json.dumps({"version": INDEX_VERSION, "docs": docs}))
+
+    def update(self, path, text=None):
+        """(Re)index a file; without text it is read on the indexing thread"""
+        self._queue.put((path, text, False))
+
+    def remove(self, path):
+        self._queue.put((path, None, True))
+
+    def wait(self):
+        """Block until the index is loaded and every queued update has been applied"""
+        self._ready.wait()
+        self._queue.join()
+
+    def _run(self, signatures):
+        try:
+            self._restore(signatures)
+        except Exception as e:
+            print(f"Error loading search index: {e}")
+        self._ready.set()
+        while True:
+            path, text, removed = self._queue.get()
+            try:
+                if not removed and text is None:
+                    text = self.read_text(path)
+                terms = Counter(tokenize(text)) if text is not None and len(text) <= self.max_file_bytes else None
+                with self._lock:
+                    self._remove(path)
+                    if terms is not None:
+                        self._add(path, terms)
+                    self.dirty = True
+            except Exception as e:
+                print(f"Error indexing {path}: {e}")
+            self._queue.task_done()
+
+    def _add(self, path, terms):
+        # Caller holds the lock
+        self._docs[path] = terms
+        length = sum(terms.values())
+        self._lengths[path] = length
+        self._total_length += length
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[path] = count
+
+    def _remove(self, path):
+        # Caller holds the lock
+        terms = self._docs.pop(path, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(path)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[path]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query, limit=20):
+        """(path, score) pairs ranked by BM25"""
+        terms = set(tokenize(query))
+        k1, b = 1.2, 0.75
+        scores = Counter()
+        with self._lock:
+            count = len(self._docs)
+            if not count or not terms:
+                return []
+            average = self._total_length / count or 1
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for path, tf in postings.items():
+                    norm = k1 * (1 - b + b * self._lengths[path] / average)
+                    scores[path] += idf * tf * (k1 + 1) / (tf + norm)
+        return scores.most_common(limit)
+
+
+def make_snippet(text, query, width=60):
+    """The text around the first query term, on one line"""
+    terms = tokenize(query)
+    match = re.search(r"\b(" + "|".join(map(re.escape, terms)) + r")\b", text, re.IGNORECASE) if terms else None
+    if match is None:
+        start, end = 0, min(len(text), width * 2)
+    else:
+        start, end = max(0, match.start() - width), min(len(text), match.end() + width)
+    snippet = " ".join(text[start:end].split())
+    return ("..." if start > 0 else "") + snippet + ("..." if end < len(text) else "")
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import tempfile
+import threading
+from collections import namedtuple
+from .file_writer import atomic_write, match_mode
+
+SnapshotInfo = namedtuple("SnapshotInfo", ["snapshot_id", "created", "files", "size"])
+
+CHUNK = 1024 * 1024
+
+
+class SnapshotStore:
+    """Content-addressed snapshots of the real filesystem tree.
+    Each distinct file content is stored once, zlib-compressed, under its sha256. A stat cache
+    (size + mtime per path) means only files that changed since the last look get hashed."""
+    def __init__(self, real_root, store_dir, exclude=()):
+        self.real_root = real_root
+        self.dir = store_dir
+        self.objects_dir = store_dir / "objects"
+        self.exclude = set(exclude)  # Top-level names that are never snapshotted
+        self._stat_cache_path = store_dir / "stat_cache.json"
+        self._stat_cache = None  # Path -> [size, mtime_ns, sha256], loaded on first use
+        self._lock = threading.Lock()
+
+    def _load_stat_cache(self):
+        if self._stat_cache is None:
+            try:
+                with open(self._stat_cache_path) as file:
+                    self._stat_cache = json.load(file)
+            except (OSError, ValueError):
+                self._stat_cache = {}
+        return self._stat_cache
+
+    def _scan(self):
+        """Path -> stat for every real file, in one scandir pass"""
+        files = {}
+        stack = [("", str(self.real_root))]
+        while stack:
+            prefix, real_dir = stack.pop()
+            with os.scandir(real_dir) as entries:
+                for entry in entries:
+                    if not prefix and entry.name in self.exclude:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((prefix + entry.name + "/", entry.path))
+                    elif entry.is_file() and not (entry.name.startswith(".") and entry.name.endswith(".tmp")):
+                        files[prefix + entry.name] = entry.stat()
+        return files
+
+    def _object_path(self, digest):
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _store_object(self, real_path):
+        """Hash a file and, if its content is new, compress it into the object store (one read)"""
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        compressor = zlib.compressobj(6)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.objects_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out, open(real_path, 'rb') as source:
+                for block in iter(lambda: source.read(CHUNK), b""):
+                    digest.update(block)
+                    out.write(compressor.compress(block))
+                out.write(compressor.flush())
+            object_path = self._object_path(digest.hexdigest())
+            if object_path.exists():
+                os.unlink(tmp_path)  # Already have this content
+            else:
+                object_path.parent.mkdir(exist_ok=True)
+                os.replace(tmp_path, object_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest.hexdigest()
+
+    def _extract_object(self, digest, real_path):
+        """Write an object's content to real_path atomically"""
+        real_path.parent.mkdir(parents=True, exist_ok=True)
+        decompressor = zlib.decompressobj()
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{real_path.name}.", suffix=".tmp", dir=real_path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as out, open(self._object_path(digest), 'rb') as source:
+                for block in iter(lambda: source.read(CHUNK), b""):
+                    out.write(decompressor.decompress(block))
+                out.write(decompressor.flush())
+                out.flush()
+                os.fsync(out.fileno())
+                match_mode(out.fileno(), real_path)
+            os.replace(tmp_path, real_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def create(self, snapshot_id=None):
+        """Snapshot the tree; unchanged files cost a stat and a dict lookup"""
+        with self._lock:
+            stat_cache = self._load_stat_cache()
+            files = {}
+            total = 0
+            for path, stat in self._scan().items():
+                known = stat_cache.get(path)
+                if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                    digest = known[2]
+                else:
+                    digest = self._store_object(self.real_root / path)
+                    stat_cache[path] = [stat.st_size, stat.st_mtime_ns, digest]
+                files[path] = [digest, stat.st_size]
+                total += stat.st_size
+            for path in set(stat_cache) - set(files):
+                del stat_cache[path]
+
+            created = time.time()
+            snapshot_id = snapshot_id or time.strftime("%Y%m%d-%H%M%S", time.localtime(created)) + f"-{int(created * 1000) % 1000:03d}"
+            if "/" in snapshot_id or snapshot_id.startswith("."):
+                raise ValueError(f"Invalid snapshot name: {snapshot_id}")
+            atomic_write(self.dir / f"{snapshot_id}.json", json.dumps({"created": created, "files": files}))
+            atomic_write(self._stat_cache_path, json.dumps(stat_cache))
+            return SnapshotInfo(snapshot_id, created, len(files), total)
+
+    def _read(self, snapshot_id):
+        try:
+            with open(self.dir / f"{snapshot_id}.json") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Snapshot not found: {snapshot_id}")
+
+    def list(self):
+        """Snapshots, newest first"""
+        infos = []
+        if self.dir.exists():
+            for path in self.dir.glob("*.json"):
+                if path.name == self._stat_cache_path.name:
+                    continue
+                data = self._read(path.stem)
+                infos.append(SnapshotInfo(path.stem, data["created"], len(data["files"]),
+                                          sum(item[1] for item in data["files"].values())))
+        return sorted(infos, key=lambda info: info.created, reverse=True)
+
+    def restore(self, snapshot_id, remove):
+        """Make the tree match a snapshot, touching only files that differ.
+        remove(path) gets rid of files the snapshot doesn't have. Returns the changed paths."""
+        with self._lock:
+            target = self._read(snapshot_id)["files"]
+            stat_cache = self._load_stat_cache()
+            current = self._scan()
+            changed = []
+            for path, (digest, _) in target.items():
+                stat = current.get(path)
+                known = stat_cache.get(path)
+                if (stat is not None and known is not None and known[0] == stat.st_size
+                        and known[1] == stat.st_mtime_ns and known[2] == digest):
+                    continue  # Already has that content
+                real_path = self.real_root / path
+                self._extract_object(digest, real_path)
+                stat = real_path.stat()
+                stat_cache[path] = [stat.st_size, stat.st_mtime_ns, digest]
+                changed.append(path)
+            for path in set(current) - set(target):
+                remove(path)
+                stat_cache.pop(path, None)
+                changed.append(path)
+            atomic_write(self._stat_cache_path, json.dumps(stat_cache))
+            return changed
+
+    def delete(self, snapshot_id):
+        os.unlink(self.dir / f"{snapshot_id}.json")
+
+    def collect_garbage(self):
+        """Remove objects no snapshot refers to; returns how many were removed"""
+        with self._lock:
+            live = set()
+            for info in self.list():
+                live.update(item[0] for item in self._read(info.snapshot_id)["files"].values())
+            removed = 0
+            if self.objects_dir.exists():
+                for object_path in self.objects_dir.glob("*/*"):
+                    if object_path.parent.name + object_path.name not in live:
+                        os.unlink(object_path)
+                        removed += 1
+            return removed
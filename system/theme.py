@@ -1,5 +1,9 @@
 class Theme:
-    pass
+    revision = 0  # Bumped on color changes so retained window surfaces get re-rendered
+
+    def invalidate(self):
+        """Call after changing theme colors at runtime"""
+        self.revision += 1
 
 class CyberTheme(Theme):
     def __init__(self):
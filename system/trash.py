@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict, namedtuple
+from .file_writer import atomic_write
+
+TrashEntry = namedtuple("TrashEntry", ["entry_id", "path", "deleted_at", "size"])
+
+class Trash:
+    """Deleted files, parked in a trash directory with a rename so deleting costs O(1)
+    whatever the file size. Old entries are purged on a background thread."""
+    def __init__(self, trash_dir, max_age=7 * 24 * 3600, max_bytes=1024 ** 3, purge_interval=600):
+        self.dir = trash_dir
+        self.index_path = trash_dir / "index.json"
+        self.max_age = max_age  # Seconds an entry is kept
+        self.max_bytes = max_bytes  # Oldest entries go first past this total size
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._entries = self._load_index()  # Entry id -> TrashEntry, oldest first
+        self._batch_depth = 0  # Index writes are held back while above zero
+        self._batch_dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as file:
+                return OrderedDict((item[0], TrashEntry(*item)) for item in json.load(file))
+        except (OSError, ValueError, TypeError):
+            return OrderedDict()
+
+    def _save_index(self):
+        # Caller holds the lock
+        if self._batch_depth:
+            self._batch_dirty = True
+            return
+        self._batch_dirty = False
+        atomic_write(self.index_path, json.dumps([list(entry) for entry in self._entries.values()]))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.purge_interval):
+            try:
+                self.purge()
+            except OSError as e:
+                print(f"Error purging trash: {e}")
+
+    @contextmanager
+    def batch(self):
+        """Write the index once, when the block ends, instead of after every add or restore"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_dirty:
+                    self._save_index()
+
+    def entries(self):
+        """Trashed files, most recently deleted first"""
+        with self._lock:
+            return list(reversed(self._entries.values()))
+
+    def get(self, entry_id):
+        with self._lock:
+            entry = self._entries.get(entry_id)
+        if entry is None:
+            raise FileNotFoundError(f"Not in trash: {entry_id}")
+        return entry
+
+    def add(self, real_path, path, size):
+        """Move a real file into the trash and remember where it came from"""
+        entry = TrashEntry(uuid.uuid4().hex, path, time.time(), size)
+        stored = self.dir / entry.entry_id
+        try:
+            os.replace(real_path, stored)
+        except FileNotFoundError:
+            if not real_path.exists():
+                raise
+            self.dir.mkdir(parents=True, exist_ok=True)
+            os.replace(real_path, stored)
+        with self._lock:
+            self._entries[entry.entry_id] = entry
+            self._save_index()
+        return entry
+
+    def restore(self, entry_id, real_path):
+        """Move a trashed file back to real_path, which must not exist yet"""
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                raise FileNotFoundError(f"Not in trash: {entry_id}")
+            if real_path.exists():
+                raise FileExistsError(f"File already exists: {entry.path}")
+            real_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self.dir / entry_id, real_path)
+            del self._entries[entry_id]
+            self._save_index()
+        return entry
+
+    def purge(self, max_age=None, max_bytes=None):
+        """Permanently delete entries older than max_age, then the oldest until under max_bytes"""
+        max_age = self.max_age if max_age is None else max_age
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        cutoff = time.time() - max_age
+        with self._lock:
+            victims = [entry for entry in self._entries.values() if entry.deleted_at < cutoff]
+            for entry in victims:
+                del self._entries[entry.entry_id]
+            total = sum(entry.size for entry in self._entries.values())
+            while total > max_bytes and self._entries:
+                _, entry = self._entries.popitem(last=False)
+                total -= entry.size
+                victims.append(entry)
+            if victims:
+                self._save_index()
+        # Unlinking big files can take a while; the index no longer references them
+        for entry in victims:
+            try:
+                os.unlink(self.dir / entry.entry_id)
+            except FileNotFoundError:
+                pass
+        return victims
@@ -1,13 +1,21 @@
 import pygame
 import sys
 import io
-from multiprocessing import Process, Queue
-from queue import Empty
+from multiprocessing import Process
+from queue import Empty, Queue
 import time
 from .theme import current_theme
+from .fonts import font_cache
+from .compositor import Compositor
+from .scheduler import FrameScheduler
+from .app_host import IsolatedAppHost
+from .scrollback import Scrollback
+from collections import OrderedDict
 import psutil  # Add at top with other imports
 
 class Window:
+    animated = False  # Animated windows get redrawn every frame
+
     def __init__(self, title, x, y, width, height):
         self.title = title
         self.x = x
@@ -20,8 +28,38 @@ class Window:
         self.active = True
         self.title_bar_height = 25
         self.close_button = pygame.Rect(width - 25, 0, 25, 25)
-        
+        self.dirty = True  # Content changed since the last frame (read by the compositor)
+
+        # Retained rendering: the window is only re-rendered when something changed
+        self.frame = pygame.Surface((width + 4, height + 4))  # Window surface plus border
+        self._needs_render = True
+        self._chrome_key = None  # (title, active, theme revision) the frame was rendered with
+
+    def get_rect(self):
+        """Screen area covered by the window, including its border"""
+        return pygame.Rect(self.x - 2, self.y - 2, self.width + 4, self.height + 4)
+
+    def invalidate(self):
+        """Tell the compositor this window needs a redraw and drop the retained frame"""
+        self.dirty = True
+        self._needs_render = True
+
+    def _refresh(self):
+        """Re-render the retained surfaces if the chrome or content changed"""
+        chrome_key = (self.title, self.active, current_theme.revision)
+        if chrome_key != self._chrome_key:
+            self._chrome_key = chrome_key
+            self._needs_render = True
+        if self._needs_render:
+            self._needs_render = False
+            self.render()
+
     def draw(self, screen):
+        # An unchanged window is a single blit of its retained frame
+        self._refresh()
+        screen.blit(self.frame, (self.x - 2, self.y - 2))
+
+    def render(self):
         # Draw window background
         self.surface.fill(current_theme.window_bg)
         
@@ -30,8 +68,7 @@ class Window:
         pygame.draw.rect(self.surface, title_color, (0, 0, self.width, self.title_bar_height))
         
         # Draw title text
-        font = pygame.font.Font(None, 24)
-        title_text = font.render(self.title, True, current_theme.title_text)
+        title_text = font_cache.render(self.title, current_theme.title_text, 24)
         self.surface.blit(title_text, (5, 5))
         
         # Draw close button
@@ -44,13 +81,13 @@ class Window:
         # Draw window content
         self.draw_content()
         
-        # Draw the window to the screen
-        screen.blit(self.surface, (self.x, self.y))
+        # Compose the window into the retained frame
+        self.frame.blit(self.surface, (2, 2))
         
         # Draw active window border
         border_color = current_theme.window_border_active if self.active else current_theme.window_border_inactive
-        pygame.draw.rect(screen, border_color, 
-                       (self.x - 2, self.y - 2, self.width + 4, self.height + 4), 2)
+        pygame.draw.rect(self.frame, border_color, 
+                       (0, 0, self.width + 4, self.height + 4), 2)
     
     def draw_content(self):
         # Override this in subclasses
@@ -101,39 +138,138 @@ class Window:
 class TerminalWindow(Window):
     def __init__(self, title, x, y, width, height):
         super().__init__(title, x, y, width, height)
-        self.output_buffer = []
-        self.font = pygame.font.Font(None, 24)
+        self.scrollback = Scrollback(100000)
+        self.scroll_lines = 0  # How many lines the view is scrolled up from the bottom
+        self.scroll_step = 3  # Lines per mouse wheel notch
+        self._wrap_cache = OrderedDict()  # absolute line number -> wrapped segments
+        self._row_cache = OrderedDict()  # (absolute line number, segment) -> rendered surface
+        self.font = font_cache.get_font(None, 24)
         self.text_color = current_theme.terminal_text
         self.background_color = current_theme.terminal_bg
         self.line_height = 20
-        self.output_queue = Queue()
-        self.max_lines = (height - self.title_bar_height - 30) // self.line_height  # Adjust for action bar
+        self.output_queue = Queue(maxsize=256)  # Bounded: scripts block when we fall behind
+        self.output_stream = None  # ScriptOutput feeding output_queue, if any
+        self.max_chunks_per_frame = 64  # Don't let a flood of output stall a frame
+        self.max_lines = (height - self.title_bar_height - 30) // self.line_height  # Rows that fit on screen
+        self.max_cached_rows = self.max_lines * 4
         
         # Action bar buttons
         self.action_bar_height = 30
         self.clear_button = pygame.Rect(5, self.title_bar_height, 60, 25)
         self.copy_button = pygame.Rect(70, self.title_bar_height, 60, 25)
+        self.kill_button = pygame.Rect(135, self.title_bar_height, 60, 25)
+        
+        # Script run shown in this terminal, if any
+        self.run = None
+        self.base_title = title
+
+    def attach_run(self, run):
+        """Show a ScriptRun's status in the title and allow killing it"""
+        self.run = run
+        self.title = f"{self.base_title} [{run.status_text()}]"
         
     def add_output(self, text):
         lines = text.split('\n')
         for line in lines:
-            self.output_buffer.append(line)
-            if len(self.output_buffer) > self.max_lines:
-                self.output_buffer.pop(0)
+            self.scrollback.append(line)
+        if self.scroll_lines:
+            # Keep the view on what the user scrolled back to
+            self.scroll_lines = min(self.scroll_lines + len(lines), len(self.scrollback) - 1)
+        self.invalidate()
+
+    def clear_output(self):
+        self.scrollback.clear()
+        self.scroll_lines = 0
+        self._wrap_cache.clear()
+        self._row_cache.clear()
+        self.invalidate()
+
+    def scroll(self, lines):
+        """Scroll the view; positive scrolls back into history"""
+        scroll_lines = max(0, min(self.scroll_lines + lines, len(self.scrollback) - 1))
+        if scroll_lines != self.scroll_lines:
+            self.scroll_lines = scroll_lines
+            self.invalidate()
+
+    def _wrap(self, number, line):
+        """Split a line into segments that fit the window, computed only when the line is shown"""
+        segments = self._wrap_cache.get(number)
+        if segments is not None:
+            self._wrap_cache.move_to_end(number)
+            return segments
+        
+        max_width = self.width - 10
+        segments = []
+        while self.font.size(line)[0] > max_width:
+            # Binary search the longest prefix that still fits
+            low, high = 1, len(line)
+            while low < high:
+                mid = (low + high + 1) // 2
+                if self.font.size(line[:mid])[0] <= max_width:
+                    low = mid
+                else:
+                    high = mid - 1
+            segments.append(line[:low])
+            line = line[low:]
+        segments.append(line)
+        
+        self._wrap_cache[number] = segments
+        if len(self._wrap_cache) > self.max_cached_rows:
+            self._wrap_cache.popitem(last=False)
+        return segments
+
+    def _render_row(self, number, index, segment):
+        key = (number, index)
+        surface = self._row_cache.get(key)
+        if surface is not None:
+            self._row_cache.move_to_end(key)
+            return surface
+        surface = self.font.render(segment, True, self.text_color)
+        self._row_cache[key] = surface
+        if len(self._row_cache) > self.max_cached_rows:
+            self._row_cache.popitem(last=False)
+        return surface
+
+    def update(self):
+        # Keep the run status (and its wall/CPU times once done) in the title
+        if self.run is not None:
+            self.title = f"{self.base_title} [{self.run.status_text()}]"
+        
+        # Process pending output, a bounded amount per frame
+        for _ in range(self.max_chunks_per_frame):
+            try:
+                self.add_output(self.output_queue.get_nowait())
+            except Empty:
+                break
+
+    def close(self):
+        super().close()
+        if self.output_stream is not None:
+            self.output_stream.abandon()  # Don't leave the script blocked on a full queue
+        if self.run is not None:
+            self.run.kill()  # Nobody is watching it any more
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
             mouse_pos = pygame.mouse.get_pos()
             local_pos = (mouse_pos[0] - self.x, mouse_pos[1] - self.y)
             
+            if local_pos[1] >= self.title_bar_height + self.action_bar_height and event.button in (4, 5):
+                # Mouse wheel scrolls through the scrollback
+                self.scroll(self.scroll_step if event.button == 4 else -self.scroll_step)
+                return True
+            
             if self.clear_button.collidepoint(local_pos):
-                self.output_buffer = []
+                self.clear_output()
                 return True
             elif self.copy_button.collidepoint(local_pos):
                 # Copy output to clipboard
-                output_text = '\n'.join(self.output_buffer)
+                output_text = self.scrollback.text()
                 pygame.scrap.put(pygame.SCRAP_TEXT, output_text.encode())
                 return True
+            elif self.kill_button.collidepoint(local_pos) and self.run is not None:
+                self.run.kill()
+                return True
                 
         return super().handle_event(event)
 
@@ -145,41 +281,66 @@ class TerminalWindow(Window):
         # Draw action buttons
         pygame.draw.rect(self.surface, current_theme.button_bg, self.clear_button)
         pygame.draw.rect(self.surface, current_theme.button_bg, self.copy_button)
+        if self.run is not None:
+            pygame.draw.rect(self.surface, current_theme.button_bg, self.kill_button)
         
         # Draw button text
-        clear_text = self.font.render('Clear', True, current_theme.title_text)
-        copy_text = self.font.render('Copy', True, current_theme.title_text)
+        clear_text = font_cache.render('Clear', current_theme.title_text, 24)
+        copy_text = font_cache.render('Copy', current_theme.title_text, 24)
         self.surface.blit(clear_text, (10, self.title_bar_height + 5))
         self.surface.blit(copy_text, (75, self.title_bar_height + 5))
+        if self.run is not None:
+            kill_text = font_cache.render('Kill', current_theme.title_text, 24)
+            self.surface.blit(kill_text, (140, self.title_bar_height + 5))
         
         # Draw terminal content
         pygame.draw.rect(self.surface, self.background_color, 
                         (0, self.title_bar_height + self.action_bar_height, 
                          self.width, self.height - self.title_bar_height - self.action_bar_height))
         
+        # Collect just the rows that fit, walking up from the bottom of the view
+        rows = []
+        index = len(self.scrollback) - 1 - self.scroll_lines
+        first_number = self.scrollback.first_number
+        while index >= 0 and len(rows) < self.max_lines:
+            number = first_number + index
+            segments = self._wrap(number, self.scrollback[index])
+            for segment_index in range(len(segments) - 1, -1, -1):
+                rows.append((number, segment_index, segments[segment_index]))
+                if len(rows) == self.max_lines:
+                    break
+            index -= 1
+        
         # Draw output text
         y = self.title_bar_height + self.action_bar_height + 5
-        for line in self.output_buffer:
-            text_surface = self.font.render(line, True, self.text_color)
-            self.surface.blit(text_surface, (5, y))
+        for number, segment_index, segment in reversed(rows):
+            self.surface.blit(self._render_row(number, segment_index, segment), (5, y))
             y += self.line_height
 
-        # Process any pending output
-        while not self.output_queue.empty():
-            self.add_output(self.output_queue.get_nowait())
-
 class PyAppWindow(Window):
-    def __init__(self, title, x, y, width, height, app_code, window_manager):  # Add window_manager param
+    @property
+    def animated(self):
+        # Apps draw straight to the screen on every frame the scheduler gives them
+        return self.running and self.frame_due
+
+    def __init__(self, title, x, y, width, height, app_code, window_manager, isolated=False):  # Add window_manager param
         super().__init__(title, x, y, width, height)
         self.app_code = app_code
         self.running = True
+        self.host = None  # IsolatedAppHost when the app runs in its own process
         self.content_rect = pygame.Rect(5, self.title_bar_height + 5, 
                                       width - 10, height - self.title_bar_height - 10)
-        self.clock = pygame.time.Clock()
-        self.last_update = pygame.time.get_ticks()
+        
+        # Frame pacing is owned by the window manager's scheduler
+        self.target_fps = 60
+        self.frame_due = True
+        self.frame_delta = 0.0
+        self.content_cache = None  # What the app drew on its last frame
+        self.content_cache_offset = (0, 0)
         
         # Store window manager reference
         self.window_manager = window_manager
+        self.api = PyOSAppAPI(window_manager, window_manager.filesystem)  # Pass the actual window manager instance
         
         # Create namespace for the app
         # path needs to be a full valid path. so get the location on the parent of this file, then append \filesystem\appname tpo ot
@@ -199,16 +360,29 @@ class PyAppWindow(Window):
             '__builtins__': __builtins__,
             'running': True,
             'delta_time': 0.0,
-            'api': PyOSAppAPI(window_manager, window_manager.filesystem),  # Pass the actual window manager instance
+            'api': self.api,
             'is_taskmanager': 'tskmngr.pya' in title.lower()  # Special flag for task manager
         }
         
+        if isolated:
+            # Run the app in its own process; it draws into a shared-memory framebuffer
+            try:
+                self.host = IsolatedAppHost(self, self.app_code, path, self.content_rect.size)
+            except Exception as e:
+                print(f"Error starting isolated PyOS App: ")
+                __import__('traceback').print_exc()
+                self.running = False
+            return
+        
         try:
             # Execute the app code to define functions
             exec(self.app_code, self.namespace)
             
             if 'main' not in self.namespace:
                 raise Exception("PyOS App must define a main(screen, recSt) function")
+            
+            # Apps can ask for their own frame budget
+            self.target_fps = self.namespace.get('TARGET_FPS', self.target_fps)
                 
             # Initialize any state the app needs
             if 'init' in self.namespace:
@@ -234,31 +408,20 @@ class PyAppWindow(Window):
             else:
                 event_dict['button'] = event.button
             adj_event = pygame.event.Event(event.type, event_dict)
-            # Forward event to app if it has an event handler
-            if 'handle_event' in self.namespace:
-                try:
-                    result = self.namespace['handle_event'](adj_event)
-                    if result is False:  # App wants to close
-                        self.close()
-                        return False
-                    elif result is True:  # App handled the event
-                        return True
-                except Exception as e:
-                    print(f"Error in app event handler:")
-                    __import__('traceback').print_exc()
+            result = self._forward_event(adj_event)
+            if result is False:  # App wants to close
+                self.close()
+                return False
+            elif result is True:  # App handled the event
+                return True
         elif event.type == pygame.KEYDOWN:
-            # Forward keyboard events to app if it has an event handler
-            if 'handle_event' in self.namespace:
-                try:
-                    result = self.namespace['handle_event'](event)
-                    if result is False:  # App wants to close
-                        self.close()
-                        return False
-                    elif result is True:  # App handled the event
-                        return True
-                except Exception as e:
-                    print(f"Error in app event handler:")
-                    __import__('traceback').print_exc()
+            # Forward keyboard events to app
+            result = self._forward_event(event)
+            if result is False:  # App wants to close
+                self.close()
+                return False
+            elif result is True:  # App handled the event
+                return True
             
         # Handle window events
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -288,8 +451,52 @@ class PyAppWindow(Window):
         
         return True
 
+    def _forward_event(self, event):
+        """Hand an event to the app's handle_event; returns what it returned"""
+        if self.host is not None:
+            # Isolated apps answer asynchronously (a close request comes back through update)
+            self.window_manager.scheduler.wake(self)
+            if hasattr(event, 'pos'):
+                # Their surface starts at the content area, so positions do too
+                pos = (event.pos[0] - self.content_rect.x, event.pos[1] - self.content_rect.y)
+                event = pygame.event.Event(event.type, dict(event.dict, pos=pos))
+            self.host.send_event(event)
+            return None
+        if 'handle_event' not in self.namespace:
+            return None
+        self.window_manager.scheduler.wake(self)  # Show the app's reaction right away
+        try:
+            return self.namespace['handle_event'](event)
+        except Exception as e:
+            print(f"Error in app event handler:")
+            __import__('traceback').print_exc()
+            return None
+
+    def update(self):
+        if self.host is None or not self.running:
+            return
+        
+        # Service API calls and frame notifications from the app process
+        if not self.host.poll(self.api):
+            self.close()
+            self.window_manager.windows_to_remove.append(self)
+        elif not self.host.alive:
+            print(f"Error in isolated app {self.title}:")
+            print(self.host.error or "App process exited")
+            self.running = False
+            self.release_host()
+        elif self.host.target_fps and self.host.target_fps != self.target_fps:
+            self.window_manager.set_target_fps(self, self.host.target_fps)
+
+    def release_host(self):
+        """Stop the app process and free its framebuffer; safe to call more than once"""
+        if self.host is not None:
+            self.host.close(self.api)
+
     def close(self):
-        if 'close' in self.namespace:
+        if self.host is not None:
+            self.release_host()
+        elif 'close' in self.namespace:
             self.namespace['close']()
         self.running = False
         self.active = False
@@ -299,34 +506,8 @@ class PyAppWindow(Window):
             return
             
         try:
-            # Calculate delta time
-            current_time = pygame.time.get_ticks()
-            delta_time = (current_time - self.last_update) / 1000.0  # Convert to seconds
-            self.last_update = current_time
-            self.namespace['delta_time'] = delta_time
-            
-            # Draw window frame
-            self.surface.fill(current_theme.window_bg)
-            pygame.draw.rect(self.surface, current_theme.window_title_active if self.active else current_theme.window_title_inactive, 
-                           (0, 0, self.width, self.title_bar_height))
-            
-            # Draw title text
-            font = pygame.font.Font(None, 24)
-            title_text = font.render(self.title, True, current_theme.title_text)
-            self.surface.blit(title_text, (5, 5))
-            
-            # Draw close button
-            pygame.draw.rect(self.surface, (255, 0, 0), self.close_button)
-            pygame.draw.line(self.surface, current_theme.text, 
-                           (self.width - 22, 5), (self.width - 7, 20), 2)  # Moved 2px left
-            pygame.draw.line(self.surface, current_theme.text, 
-                           (self.width - 7, 5), (self.width - 22, 20), 2)  # Moved 2px left
-            
-            # Draw window border
-            border_color = current_theme.window_border_active if self.active else current_theme.window_border_inactive
-            pygame.draw.rect(self.surface, border_color, (0, 0, self.width, self.height), 2)
-            
-            # Draw window to screen first
+            # Draw window to screen first (chrome is retained between frames)
+            self._refresh()
             screen.blit(self.surface, (self.x, self.y))
             
             # Calculate content area in screen coordinates
@@ -337,12 +518,33 @@ class PyAppWindow(Window):
                 self.content_rect.height
             )
             
+            if self.host is not None:
+                # Ask the app process for a new frame and show the last finished one
+                if self.frame_due:
+                    self.frame_due = False
+                    mouse_pos = pygame.mouse.get_pos()
+                    self.host.request_frame(self.frame_delta, (mouse_pos[0] - content_screen_rect.x,
+                                                               mouse_pos[1] - content_screen_rect.y))
+                screen.blit(self.host.surface, content_screen_rect.topleft)
+                return
+            
+            if not self.frame_due:
+                # Not this app's turn: put back what it drew last time
+                if self.content_cache is not None:
+                    screen.blit(self.content_cache, (self.x + self.content_cache_offset[0],
+                                                     self.y + self.content_cache_offset[1]))
+                return
+            self.frame_due = False
+            self.namespace['delta_time'] = self.frame_delta
+            
             # Let the app draw directly to the screen in its area
             if 'main' in self.namespace:
                 self.namespace['main'](screen, content_screen_rect)
-                
-            # Maintain consistent frame rate
-            self.clock.tick(60)
+            
+            # Keep a copy so the window can be redrawn without running the app
+            visible = content_screen_rect.clip(screen.get_rect())
+            self.content_cache = screen.subsurface(visible).copy()
+            self.content_cache_offset = (visible.x - self.x, visible.y - self.y)
             
         except Exception as e:
             #print(f"Error in app main loop: {str(e)}")
@@ -350,6 +552,27 @@ class PyAppWindow(Window):
             __import__('traceback').print_exc()
             self.running = False
 
+    def render(self):
+        # Draw window frame; the app content is drawn on top every frame
+        self.surface.fill(current_theme.window_bg)
+        pygame.draw.rect(self.surface, current_theme.window_title_active if self.active else current_theme.window_title_inactive, 
+                       (0, 0, self.width, self.title_bar_height))
+        
+        # Draw title text
+        title_text = font_cache.render(self.title, current_theme.title_text, 24)
+        self.surface.blit(title_text, (5, 5))
+        
+        # Draw close button
+        pygame.draw.rect(self.surface, (255, 0, 0), self.close_button)
+        pygame.draw.line(self.surface, current_theme.text, 
+                       (self.width - 22, 5), (self.width - 7, 20), 2)  # Moved 2px left
+        pygame.draw.line(self.surface, current_theme.text, 
+                       (self.width - 7, 5), (self.width - 22, 20), 2)  # Moved 2px left
+        
+        # Draw window border
+        border_color = current_theme.window_border_active if self.active else current_theme.window_border_inactive
+        pygame.draw.rect(self.surface, border_color, (0, 0, self.width, self.height), 2)
+
     def _get_window_manager(self):
         return self.window_manager
 
@@ -358,13 +581,36 @@ class WindowManager:
         self.screen = screen
         self.windows = []
         self.windows_to_remove = []  # Add this to track windows that need removal
+        self.compositor = Compositor(screen)
+        self.scheduler = FrameScheduler()
+        self.isolate_apps = False  # Run every .pya app in its own process
         self.last_frame_time = time.time()
         self.frame_times = []  # Store last 60 frame times
         self.filesystem = filesystem
+        self._listeners = []  # Called with (window, opened) when a window opens or closes
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, window, opened):
+        for callback in list(self._listeners):
+            callback(window, opened)
         
     def create_window(self, window):
         self.windows.append(window)
         self.activate_window(window)
+        if isinstance(window, PyAppWindow):
+            self.scheduler.register(window, window.target_fps)
+        self._notify(window, True)
+
+    def set_target_fps(self, window, fps):
+        """Change how often an app window's main() gets called"""
+        window.target_fps = fps
+        self.scheduler.set_rate(window, fps)
         
     def activate_window(self, window):
         # Deactivate all windows
@@ -408,15 +654,34 @@ class WindowManager:
         for window in self.windows_to_remove:
             if window in self.windows:
                 self.windows.remove(window)
+                self._notify(window, False)
+            self.scheduler.unregister(window)
+            if isinstance(window, PyAppWindow):
+                window.release_host()  # However it got here, don't leak the app process
         self.windows_to_remove.clear()
         
+        # Decide which apps get a frame this time around
+        self.scheduler.update()
+        
         # Update all windows
         for window in self.windows:
             window.update()
+
+        # Work out what needs redrawing this frame
+        self.compositor.track_windows(self.windows)
             
+    def shutdown(self):
+        """Close isolated app processes so none outlive the OS"""
+        for window in self.windows:
+            if isinstance(window, PyAppWindow):
+                window.release_host()
+
     def draw(self):
-        # Draw all windows in order (bottom to top)
+        # Draw all windows in order (bottom to top), skipping ones outside the damage
+        clip = self.compositor.clip_rect
         for window in self.windows:
+            if clip is not None and not window.animated and not clip.colliderect(window.get_rect()):
+                continue
             window.draw(self.screen)
 
     def create_api(self, fs):
@@ -448,7 +713,9 @@ class WindowManager:
                 "cpu": psutil.cpu_percent(interval=None), # Get CPU usage without delay
                 'memory': psutil.virtual_memory().percent,
                 'window_count': len(self.windows),
-                'fps': int(current_fps)
+                'fps': int(current_fps),
+                'font_cache': font_cache.get_stats(),
+                'filesystem_boot': self.filesystem.boot_stats if self.filesystem else {}
             }
             return metrics
         except Exception as e: